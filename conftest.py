@@ -0,0 +1 @@
+# Lets the tests import models/ and utils/ from the repository root
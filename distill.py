@@ -0,0 +1,81 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from evaluate import HELD_OUT_SEED
+from models.dqn_agent import MaintenanceAgent
+from models.distilled_policy import DistilledPolicy
+from models.fleet_features import FleetFeatures
+from models.maintenance_env import STATE_FEATURES
+from sweep import load_dataset
+
+
+def fleet_states(num_machines, seed, days=60, data_dir=None):
+    """Realistic states: a synthetic fleet observed on every day of a window"""
+    equipment_df, history_df, issues_df = load_dataset(data_dir, num_machines, seed)
+    features = FleetFeatures.from_frames(equipment_df, history_df)
+    issue_priority, has_issues = features.issue_aggregates(issues_df)
+    start = datetime.now()
+    return np.concatenate([
+        features.compute_states(start + timedelta(days=day), issue_priority, has_issues)
+        for day in range(days)
+    ])
+
+
+def uniform_states(num_samples, reference_states, seed):
+    """States drawn uniformly over [0, 1] per feature, widened to the range of the reference sample"""
+    rng = np.random.default_rng(seed)
+    low = np.minimum(np.nanmin(reference_states, axis=0), 0)
+    high = np.maximum(np.nanmax(reference_states, axis=0), 1)
+    return rng.uniform(low, high, size=(num_samples, len(STATE_FEATURES))).astype(np.float32)
+
+
+def time_predictions(predictor, states, repeats=5):
+    """Best-of-n wall time per state in microseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.predict_maintenance(states)
+        best = min(best, time.perf_counter() - start)
+    return best / len(states) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Distill the DQN policy into a quantized lookup table')
+    parser.add_argument('--checkpoint', default='models/saved/maintenance_dqn_best.pth')
+    parser.add_argument('--output', default='models/saved/maintenance_policy_table.npz')
+    parser.add_argument('--num-machines', type=int, default=500, help='Fleet used to place bin edges')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bins', action='append', metavar='FEATURE=N', default=[],
+                        help='Override the number of bins of a continuous feature (repeatable)')
+    args = parser.parse_args()
+
+    teacher = MaintenanceAgent(state_size=len(STATE_FEATURES), action_size=2)
+    teacher.load(args.checkpoint)
+
+    bins = {name: int(count) for name, count in (item.split('=') for item in args.bins)}
+    # Place bin edges on realistic states plus uniform coverage of the whole state space
+    observed = fleet_states(args.num_machines, args.seed)
+    reference = np.concatenate([observed, uniform_states(len(observed), observed, args.seed)])
+
+    start = time.perf_counter()
+    table = DistilledPolicy.fit(teacher, reference, bins=bins)
+    print(f"Fitted {table.table_size} cells in {time.perf_counter() - start:.1f}s")
+
+    # Agreement on a held-out fleet and on uniform samples of the state space
+    held_out = fleet_states(args.num_machines, HELD_OUT_SEED)
+    for name, states in [('held-out fleet', held_out), ('uniform', uniform_states(100000, reference, args.seed + 1))]:
+        report = table.agreement(teacher, states)
+        print(f"{name}: agreement {report['action_agreement']:.4f}, "
+              f"confidence MAE {report['confidence_mae']:.4f}, "
+              f"maintenance rate {report['maintenance_rate_distilled']:.3f} "
+              f"(teacher {report['maintenance_rate_teacher']:.3f}), {report['samples']} states")
+
+    held_out = held_out[~np.isnan(held_out).any(axis=1)]
+    print(f"Inference: DQN {time_predictions(teacher, held_out):.2f}us/state, "
+          f"table {time_predictions(table, held_out):.2f}us/state")
+
+    table.save(args.output)
+    print(f"\nLookup table saved to '{args.output}'")
@@ -0,0 +1,103 @@
+import argparse
+import glob
+import os
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from models.dqn_agent import MaintenanceAgent
+from models.feature_env import FeatureMaintenanceEnv
+from models.fleet_features import date_ns
+from sweep import load_dataset
+
+# Held-out fleets use a seed the training scripts never use by default
+HELD_OUT_SEED = 20240601
+
+
+def greedy_policy(agent):
+    """Epsilon=0 policy: batched forward pass, argmax action"""
+    def policy(states):
+        actions, _ = agent.predict_maintenance(states)
+        return actions
+    return policy
+
+
+def one_step_starts(env, start_rows, start_date):
+    """Which episode starts end after their first step whatever the policy does.
+
+    Episodes end once breakdown risk exceeds 0.95, so starts that are already
+    past it (e.g. history that stops long before start_date) say nothing
+    about a checkpoint.
+    """
+    states = env.features.compute_states(date_ns(start_date), env.issue_priority, env.has_issues,
+                                         rows=np.asarray(start_rows, dtype=np.int64))
+    return states[:, 5] > 0.95
+
+
+def evaluate_checkpoint(path, env, start_rows, start_date):
+    """Roll out one checkpoint greedily on the given episode starts"""
+    agent = MaintenanceAgent(state_size=env.observation_space.shape[0], action_size=env.action_space.n)
+    agent.load(path)
+
+    start = time.perf_counter()
+    rewards, steps, maintenance_actions = env.rollout(greedy_policy(agent), start_rows, start_date)
+    seconds = time.perf_counter() - start
+    one_step_episodes = int((steps == 1).sum())
+    if len(steps) and one_step_episodes == len(steps):
+        # Rewards then only reflect the first day; callers decide whether that is usable
+        warnings.warn(f"Every evaluation episode of {path} ended after one step "
+                      "(breakdown risk already above 0.95, is the maintenance history stale?)")
+
+    return {
+        'checkpoint': path,
+        'episodes': len(rewards),
+        'mean_reward': rewards.mean(),
+        'std_reward': rewards.std(),
+        'p5_reward': np.percentile(rewards, 5),
+        'p25_reward': np.percentile(rewards, 25),
+        'median_reward': np.median(rewards),
+        'p75_reward': np.percentile(rewards, 75),
+        'p95_reward': np.percentile(rewards, 95),
+        'mean_episode_length': steps.mean(),
+        'one_step_episodes': one_step_episodes,
+        'maintenance_rate': maintenance_actions.sum() / steps.sum(),
+        'episodes_with_maintenance': (maintenance_actions > 0).mean(),
+        'seconds': seconds,
+    }
+
+
+def evaluate_checkpoints(paths, num_episodes=5000, num_machines=500, seed=HELD_OUT_SEED, data_dir=None):
+    """Evaluate checkpoints on the same held-out episodes and return a comparison table"""
+    equipment_df, history_df, issues_df = load_dataset(data_dir, num_machines, seed)
+    env = FeatureMaintenanceEnv.from_frames(equipment_df, history_df, issues_df, seed=seed)
+
+    # Every checkpoint plays exactly the same episodes
+    start_rows = env.sample_start_rows(num_episodes)
+    start_date = datetime.now()
+
+    results = [evaluate_checkpoint(path, env, start_rows, start_date) for path in paths]
+    return pd.DataFrame(results).sort_values('mean_reward', ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare DQN checkpoints on a held-out synthetic fleet')
+    parser.add_argument('checkpoints', nargs='*', help='Checkpoint files (default: models/saved/*.pth)')
+    parser.add_argument('--episodes', type=int, default=5000)
+    parser.add_argument('--num-machines', type=int, default=500, help='Size of the held-out fleet')
+    parser.add_argument('--seed', type=int, default=HELD_OUT_SEED)
+    parser.add_argument('--data-dir', default=None, help='Evaluate on CSVs from this directory instead')
+    parser.add_argument('--output', default=None, help='Also write the table to this CSV file')
+    args = parser.parse_args()
+
+    paths = args.checkpoints or sorted(glob.glob(os.path.join('models', 'saved', '*.pth')))
+    if not paths:
+        parser.error('No checkpoints given and none found in models/saved/')
+
+    results = evaluate_checkpoints(paths, args.episodes, args.num_machines, args.seed, args.data_dir)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\nEvaluation saved to '{args.output}'")
@@ -0,0 +1,173 @@
+import argparse
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from evaluate import evaluate_checkpoint, one_step_starts
+from models.dqn_agent import MaintenanceAgent, replay_path
+from models.feature_env import FeatureMaintenanceEnv
+from models.replay_buffer import MemmapReplayBuffer
+from sweep import load_dataset
+from train import run_training_episode
+from utils.fleet_scoring import DEFAULT_MODEL_PATH
+
+DEFAULT_DATA_DIR = 'data/sample_data'
+DEFAULT_SNAPSHOT_PATH = 'models/saved/finetune_snapshot.csv'
+
+
+def equipment_fingerprints(equipment_df, history_df, issues_df):
+    """Per-equipment summary of history and open issues, used to detect changed equipment.
+
+    Values are kept as strings so they compare exactly after a CSV round trip.
+    """
+    history_ids = history_df['equipment_id']
+    issue_ids = issues_df['equipment_id']
+    fingerprints = pd.DataFrame({
+        'work_orders': history_ids.groupby(history_ids).size(),
+        'cost_sum': history_df['actual_cost'].groupby(history_ids).sum().round(2),
+        'last_end': pd.to_datetime(history_df['end_date']).groupby(history_ids).max().astype(str),
+        'issues': issue_ids.groupby(issue_ids).size(),
+        'top_priority': issues_df['priority'].astype(int).groupby(issue_ids).min(),
+    }).reindex(equipment_df['equipment_id'].values)
+    fingerprints.index.name = 'equipment_id'
+    return fingerprints.fillna('').astype(str)
+
+
+def changed_equipment(fingerprints, snapshot_path):
+    """Equipment whose fingerprint differs from the last published run (all of it on the first run)"""
+    if not os.path.exists(snapshot_path):
+        return fingerprints.index
+    previous = pd.read_csv(snapshot_path, index_col='equipment_id', dtype=str, keep_default_na=False)
+    previous = previous.reindex(index=fingerprints.index, columns=fingerprints.columns)
+    return fingerprints.index[(previous != fingerprints).any(axis=1).values]
+
+
+def finetune(checkpoint=DEFAULT_MODEL_PATH, data_dir=DEFAULT_DATA_DIR, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+             steps_per_equipment=20, max_steps=5000, epsilon=0.1, eval_episodes=2000,
+             tolerance=0.0, seed=0):
+    """Warm-start from the published checkpoint and replay buffer, train on the
+    equipment that changed since the last run, and publish only if the
+    candidate does not evaluate worse than the current checkpoint"""
+    if not os.path.exists(checkpoint):
+        raise FileNotFoundError(f"No checkpoint at {checkpoint}, run train.py first")
+    equipment_df, history_df, issues_df = load_dataset(data_dir, seed=seed)
+
+    fingerprints = equipment_fingerprints(equipment_df, history_df, issues_df)
+    changed = changed_equipment(fingerprints, snapshot_path)
+    report = {'equipment': len(equipment_df), 'changed_equipment': len(changed), 'published': False}
+    if len(changed) == 0:
+        print("No equipment changed since the last run")
+        return report
+
+    env = FeatureMaintenanceEnv.from_frames(equipment_df, history_df, issues_df, seed=seed)
+    changed_rows = pd.Index(equipment_df['equipment_id']).get_indexer(changed)
+    changed_rows = changed_rows[env.features.valid[changed_rows]]
+    if len(changed_rows) == 0:
+        print("No changed equipment has a usable state")
+        return report
+    # Training episodes only start on changed equipment
+    focused_env = FeatureMaintenanceEnv(env.features, env.issue_priority, env.has_issues, changed_rows, seed=seed)
+
+    # Evaluation gate: same held-out episodes for both checkpoints, on the
+    # whole fleet and on changed equipment. Checked before spending the
+    # gradient budget, since a gate whose episodes all end on the first day
+    # (e.g. stale history) cannot tell the checkpoints apart.
+    start_date = datetime.now()
+    gates = [('fleet', env.sample_start_rows(eval_episodes)),
+             ('changed', focused_env.sample_start_rows(eval_episodes))]
+    for name, start_rows in gates:
+        if one_step_starts(env, start_rows, start_date).all():
+            report['reason'] = (f"every {name} evaluation episode ends after one step "
+                                "(breakdown risk already above 0.95, is the maintenance history stale?)")
+            print(f"Not fine-tuning: {report['reason']}")
+            return report
+
+    candidate = os.path.splitext(checkpoint)[0] + '_candidate.pth'
+    published_replay, candidate_replay = replay_path(checkpoint), replay_path(candidate)
+    state_size = env.observation_space.shape[0]
+    try:
+        shutil.rmtree(candidate_replay, ignore_errors=True)
+        if os.path.exists(os.path.join(published_replay, 'meta.json')):
+            # Train on a file-level copy of the published buffer: it keeps its stored
+            # capacity, and a rejected candidate leaves the published one untouched
+            MemmapReplayBuffer(published_replay, state_size=state_size).copy_to(candidate_replay)
+
+        agent = MaintenanceAgent(state_size=state_size, action_size=env.action_space.n, replay_dir=candidate_replay)
+        agent.load(checkpoint)
+        agent.epsilon = epsilon
+
+        # Gradient steps scale with the number of changed equipment, up to max_steps
+        step_budget = min(max_steps, steps_per_equipment * len(changed_rows))
+        start = time.perf_counter()
+        start_steps = agent.update_counter  # Carried over from the checkpoint
+        episodes = 0
+        while agent.update_counter - start_steps < step_budget:
+            run_training_episode(agent, focused_env)
+            episodes += 1
+        report.update({'episodes': episodes, 'gradient_steps': agent.update_counter - start_steps,
+                       'train_seconds': time.perf_counter() - start})
+
+        agent.save(candidate)
+        passed = True
+        for name, start_rows in gates:
+            try:
+                current_reward = float(evaluate_checkpoint(checkpoint, env, start_rows, start_date)['mean_reward'])
+                candidate_reward = float(evaluate_checkpoint(candidate, env, start_rows, start_date)['mean_reward'])
+            except Exception as e:
+                # An evaluation that cannot run rejects the candidate
+                report['reason'] = f"{name} evaluation failed: {str(e)}"
+                passed = False
+                break
+            report[f'{name}_reward_current'] = current_reward
+            report[f'{name}_reward_candidate'] = candidate_reward
+            if candidate_reward < current_reward - tolerance:
+                report['reason'] = f"{name} reward dropped by more than {tolerance}"
+                passed = False
+
+        if passed:
+            # Atomic swap, so the server's mtime-based reload never sees a partial file
+            os.replace(candidate, checkpoint)
+            shutil.rmtree(published_replay, ignore_errors=True)
+            os.rename(candidate_replay, published_replay)
+            fingerprints.to_csv(snapshot_path)
+            report['published'] = True
+    finally:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+        shutil.rmtree(candidate_replay, ignore_errors=True)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fine-tune the published checkpoint on equipment whose data changed')
+    parser.add_argument('--checkpoint', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH,
+                        help='Equipment fingerprints of the last published run')
+    parser.add_argument('--steps-per-equipment', type=int, default=20, help='Gradient steps per changed equipment')
+    parser.add_argument('--max-steps', type=int, default=5000, help='Upper bound on gradient steps')
+    parser.add_argument('--epsilon', type=float, default=0.1, help='Exploration rate to resume with')
+    parser.add_argument('--eval-episodes', type=int, default=2000)
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Allowed drop in mean evaluation reward before the candidate is rejected')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = finetune(
+        checkpoint=args.checkpoint,
+        data_dir=args.data_dir,
+        snapshot_path=args.snapshot,
+        steps_per_equipment=args.steps_per_equipment,
+        max_steps=args.max_steps,
+        epsilon=args.epsilon,
+        eval_episodes=args.eval_episodes,
+        tolerance=args.tolerance,
+        seed=args.seed
+    )
+    for name, value in report.items():
+        print(f"{name}: {value}")
+    if report['published']:
+        print(f"\nFine-tuned checkpoint published to '{args.checkpoint}'")
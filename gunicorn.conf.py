@@ -0,0 +1,14 @@
+import os
+
+# With SCHEDULER_PRELOAD set, the app (and with it the policy weights and the
+# memory-mapped fleet feature arrays, see server.preload_shared_fleet) is
+# loaded once in the master before forking, so workers share those pages
+# copy-on-write instead of each loading its own copy.
+preload_app = os.environ.get('SCHEDULER_PRELOAD', '').lower() in ('1', 'true', 'yes')
+
+
+def post_worker_init(worker):
+    # Threads do not survive fork, so each worker warms up in its own
+    # background thread; /api/ready reports when it is done
+    from server import warmup
+    warmup.start()
@@ -0,0 +1,267 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from utils.data_generator import cached_dataset
+
+ENDPOINTS = ['upload_issues', 'generate_schedule', 'download_schedule']
+
+
+class LocalServer:
+    """Runs server.app on a free local port in a background thread.
+
+    Equipment master and history point at a synthetic fleet of the requested
+    size, so scoring cost scales with the fleet like it would in production.
+    Schedules, uploads and exports go to a temporary store instead of data/.
+    shutdown() restores the module settings it replaced.
+    """
+
+    def __init__(self):
+        import server
+        from werkzeug.serving import make_server
+        from utils.schedule_export import ScheduleStore
+
+        self.server_module = server
+        self.data_dir = tempfile.mkdtemp(prefix='maintenance-loadtest-')
+        self.replaced = {name: getattr(server, name)
+                         for name in ('EQUIPMENT_PATH', 'HISTORY_PATH', 'schedule_store')}
+        store = server.schedule_store
+        server.schedule_store = ScheduleStore(base_dir=os.path.join(self.data_dir, 'store'),
+                                              max_results=store.max_results, max_age=store.max_age)
+        # Per-equipment debug logging would dominate the measured latency
+        logging.getLogger(server.__name__).setLevel(logging.WARNING)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+        self.httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def use_fleet(self, equipment_df, history_df):
+        suffix = len(equipment_df)
+        equipment_path = os.path.join(self.data_dir, f'equipment_master_{suffix}.csv')
+        history_path = os.path.join(self.data_dir, f'maintenance_history_{suffix}.csv')
+        equipment_df.to_csv(equipment_path, index=False)
+        history_df.to_csv(history_path, index=False)
+        self.server_module.EQUIPMENT_PATH = equipment_path
+        self.server_module.HISTORY_PATH = history_path
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        for name, value in self.replaced.items():
+            setattr(self.server_module, name, value)
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def wait_until_ready(url, timeout=300):
+    """Poll /api/ready until the server has warmed up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'{url}/api/ready', timeout=10) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become ready within {timeout}s")
+
+
+def multipart_body(field, filename, content, content_type='text/csv'):
+    """Encode a single file upload as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode('utf-8') + content + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def timed_request(request, timeout):
+    """Send a request; returns (seconds, status, headers), status None on connection errors"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return time.perf_counter() - start, response.status, response.headers
+    except urllib.error.HTTPError as e:
+        e.read()
+        return time.perf_counter() - start, e.code, e.headers
+    except (urllib.error.URLError, OSError):
+        return time.perf_counter() - start, None, {}
+
+
+def run_session(url, upload_body, content_type, export_format, timeout):
+    """One user: upload issues, generate a schedule, download the uploaded result"""
+    samples = []
+
+    seconds, status, headers = timed_request(urllib.request.Request(
+        f'{url}/api/upload_issues', data=upload_body, headers={'Content-Type': content_type}, method='POST'
+    ), timeout)
+    samples.append(('upload_issues', seconds, status))
+    result_id = headers.get('X-Schedule-Id')
+
+    # Regenerate from this session's own upload, not whichever upload came last
+    generate_url = f'{url}/api/generate_schedule'
+    if result_id:
+        generate_url += f'?result_id={result_id}'
+    seconds, status, _ = timed_request(urllib.request.Request(generate_url, data=b'', method='POST'), timeout)
+    samples.append(('generate_schedule', seconds, status))
+
+    download_url = f'{url}/api/download_schedule?format={export_format}'
+    if result_id:
+        download_url += f'&result_id={result_id}'
+    seconds, status, _ = timed_request(urllib.request.Request(download_url), timeout)
+    samples.append(('download_schedule', seconds, status))
+
+    return samples
+
+
+def summarize(samples, duration):
+    """Throughput, error count and latency percentiles (ms) of (seconds, status) samples.
+
+    Throughput and latencies only count successful requests, so fast failures
+    cannot make an endpoint look quick; latencies are None when every request
+    failed.
+    """
+    failed = [status is None or status >= 400 for _, status in samples]
+    latencies = np.array([seconds for (seconds, _), error in zip(samples, failed) if not error]) * 1000
+    status_codes = Counter('connection_error' if status is None else str(status) for _, status in samples)
+    summary = {
+        'requests': len(samples),
+        'errors': sum(failed),
+        'status_codes': dict(status_codes),
+        'throughput_rps': (len(samples) - sum(failed)) / duration if duration > 0 else 0.0,
+    }
+    if len(latencies):
+        summary.update({
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'max_ms': float(latencies.max()),
+        })
+    else:
+        summary.update(dict.fromkeys(['mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']))
+    return summary
+
+
+def run_level(url, upload_body, content_type, concurrency, sessions, export_format, timeout):
+    """Run sessions with the given number of concurrent users and summarize per endpoint"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_session, url, upload_body, content_type, export_format, timeout)
+            for _ in range(sessions)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+    duration = time.perf_counter() - start
+
+    endpoints = {
+        name: summarize([(seconds, status) for endpoint, seconds, status in samples if endpoint == name], duration)
+        for name in ENDPOINTS
+    }
+    return {
+        'concurrency': concurrency,
+        'sessions': sessions,
+        'duration_seconds': duration,
+        'sessions_per_second': sessions / duration,
+        'overall': summarize([(seconds, status) for _, seconds, status in samples], duration),
+        'endpoints': endpoints,
+    }
+
+
+def run_load_test(url=None, concurrency_levels=(1, 4, 8), fleet_sizes=(100,), sessions_per_user=5,
+                  export_format='csv', seed=0, timeout=300):
+    """Replay synthetic issue uploads against a URL, or a local server.app when url is None"""
+    local = None if url else LocalServer()
+    target = url or local.url
+    report = {
+        'target': url or 'local',
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'concurrency_levels': list(concurrency_levels),
+            'fleet_sizes': list(fleet_sizes),
+            'sessions_per_user': sessions_per_user,
+            'format': export_format,
+            'seed': seed,
+        },
+        'levels': [],
+    }
+
+    try:
+        for fleet_size in fleet_sizes:
+            equipment_df, history_df, issues_df = cached_dataset(num_machines=fleet_size, seed=seed)
+            if local:
+                local.use_fleet(equipment_df, history_df)
+            wait_until_ready(target)
+
+            upload_body, content_type = multipart_body(
+                'file', 'current_issues.csv', issues_df.to_csv(index=False).encode('utf-8')
+            )
+            # Untimed first session so caches for this fleet are warm
+            run_session(target, upload_body, content_type, export_format, timeout)
+
+            for concurrency in concurrency_levels:
+                level = run_level(target, upload_body, content_type, concurrency,
+                                  concurrency * sessions_per_user, export_format, timeout)
+                level.update({'fleet_size': len(equipment_df), 'issues': len(issues_df)})
+                report['levels'].append(level)
+
+                overall = level['overall']
+                if overall['p50_ms'] is None:
+                    print(f"fleet {len(equipment_df)}, concurrency {concurrency}: all {overall['errors']} requests failed")
+                    continue
+                print(f"fleet {len(equipment_df)}, concurrency {concurrency}: "
+                      f"{overall['throughput_rps']:.1f} req/s, p50 {overall['p50_ms']:.0f}ms, "
+                      f"p95 {overall['p95_ms']:.0f}ms, p99 {overall['p99_ms']:.0f}ms, "
+                      f"{overall['errors']} errors")
+    finally:
+        if local:
+            local.shutdown()
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Concurrent load test of the scheduler API')
+    parser.add_argument('--url', default=None,
+                        help='Server to test, e.g. http://localhost:5000 (default: run server.app locally)')
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma-separated numbers of concurrent users')
+    parser.add_argument('--fleet-sizes', default='100', help='Comma-separated synthetic fleet sizes')
+    parser.add_argument('--sessions-per-user', type=int, default=5,
+                        help='Upload/generate/download sessions per concurrent user')
+    parser.add_argument('--format', default='csv', help='Export format requested from download_schedule')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300, help='Per-request timeout in seconds')
+    parser.add_argument('--output', default='data/loadtest_report.json')
+    args = parser.parse_args()
+
+    report = run_load_test(
+        url=args.url,
+        concurrency_levels=[int(value) for value in args.concurrency.split(',')],
+        fleet_sizes=[int(value) for value in args.fleet_sizes.split(',')],
+        sessions_per_user=args.sessions_per_user,
+        export_format=args.format,
+        seed=args.seed,
+        timeout=args.timeout
+    )
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nLoad test report saved to '{args.output}'")
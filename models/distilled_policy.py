@@ -0,0 +1,122 @@
+import numpy as np
+import os
+
+from models.maintenance_env import STATE_FEATURES
+
+# State entries that only take a few discrete values: criticality scores and
+# issue priority scores (1.25 - 0.25 * priority, or 0 without issues)
+CATEGORICAL_VALUES = {
+    'criticality_score': [0.3, 0.6, 1.0],
+    'issue_priority': [0.0, 0.25, 0.5, 0.75, 1.0],
+}
+
+DEFAULT_BINS = {
+    'days_since_maintenance': 8,
+    'equipment_age': 8,
+    'maintenance_cycle_completion': 8,
+    'cost_ratio': 6,
+    'breakdown_risk': 10,
+    'workload_factor': 4,
+}
+
+
+class DistilledPolicy:
+    """Quantized lookup table distilled from a DQN policy.
+
+    Every state feature is cut into a few bins (quantiles of a reference
+    sample of realistic states; exact values for categorical features) and
+    the table stores the teacher's action and maintenance probability at the
+    centre of every cell. predict_maintenance has the same contract as
+    MaintenanceAgent.predict_maintenance but costs a few searchsorted calls.
+    """
+
+    def __init__(self, edges, centers, actions, confidences):
+        self.edges = edges  # per feature: inner bin edges
+        self.centers = centers  # per feature: representative value per bin
+        self.actions = actions  # int8 table, one axis per feature
+        self.confidences = confidences  # float16 table of P(maintenance)
+
+    @classmethod
+    def fit(cls, teacher, reference_states, bins=None, chunk_size=65536):
+        """Fit a table to the teacher's decisions on a dense grid over the state space.
+
+        teacher is anything with predict_maintenance(states); reference_states
+        is an (n, 8) sample of realistic states used to place the bin edges.
+        """
+        bins = dict(DEFAULT_BINS, **(bins or {}))
+        reference_states = reference_states[~np.isnan(reference_states).any(axis=1)]
+
+        edges, centers = [], []
+        for i, name in enumerate(STATE_FEATURES):
+            if name in CATEGORICAL_VALUES:
+                values = np.array(CATEGORICAL_VALUES[name])
+                centers.append(values)
+                edges.append((values[1:] + values[:-1]) / 2)
+                continue
+
+            column = reference_states[:, i]
+            cuts = np.unique(np.quantile(column, np.linspace(0, 1, bins[name] + 1)))
+            if len(cuts) < 2:
+                cuts = np.array([column.min(), column.min() + 1e-6])
+            centers.append((cuts[1:] + cuts[:-1]) / 2)
+            edges.append(cuts[1:-1])
+
+        shape = tuple(len(c) for c in centers)
+        actions = np.empty(int(np.prod(shape)), dtype=np.int8)
+        confidences = np.empty(int(np.prod(shape)), dtype=np.float16)
+
+        # Evaluate the teacher on every cell centre, in chunks to bound memory
+        for start in range(0, len(actions), chunk_size):
+            flat = np.arange(start, min(start + chunk_size, len(actions)))
+            cell = np.unravel_index(flat, shape)
+            grid_states = np.column_stack([centers[i][cell[i]] for i in range(len(shape))]).astype(np.float32)
+            chunk_actions, chunk_probs = teacher.predict_maintenance(grid_states)
+            actions[flat] = chunk_actions
+            confidences[flat] = chunk_probs[:, 1]
+
+        return cls(edges, centers, actions.reshape(shape), confidences.reshape(shape))
+
+    def _cells(self, states):
+        states = np.asarray(states, dtype=np.float32)
+        return tuple(np.searchsorted(self.edges[i], states[:, i], side='right') for i in range(len(self.edges)))
+
+    def predict_maintenance(self, states):
+        """Predict maintenance decisions for multiple equipment states"""
+        cells = self._cells(states)
+        actions = self.actions[cells].astype(np.int64)
+        confidence = self.confidences[cells].astype(np.float32)
+        return actions, np.column_stack([1 - confidence, confidence])
+
+    def agreement(self, teacher, states):
+        """Compare against the teacher: action agreement and confidence error"""
+        states = states[~np.isnan(states).any(axis=1)]
+        teacher_actions, teacher_probs = teacher.predict_maintenance(states)
+        actions, probs = self.predict_maintenance(states)
+        return {
+            'samples': len(states),
+            'action_agreement': float((actions == teacher_actions).mean()),
+            'maintenance_rate_teacher': float(teacher_actions.mean()),
+            'maintenance_rate_distilled': float(actions.mean()),
+            'confidence_mae': float(np.abs(probs[:, 1] - teacher_probs[:, 1]).mean()),
+        }
+
+    @property
+    def table_size(self):
+        return self.actions.size
+
+    def save(self, path='models/saved/maintenance_policy_table.npz'):
+        """Save the lookup table"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {'actions': self.actions, 'confidences': self.confidences}
+        for i in range(len(self.edges)):
+            arrays[f'edges_{i}'] = self.edges[i]
+            arrays[f'centers_{i}'] = self.centers[i]
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path='models/saved/maintenance_policy_table.npz'):
+        """Load a saved lookup table"""
+        with np.load(path) as data:
+            edges = [data[f'edges_{i}'] for i in range(len(STATE_FEATURES))]
+            centers = [data[f'centers_{i}'] for i in range(len(STATE_FEATURES))]
+            return cls(edges, centers, data['actions'], data['confidences'])
@@ -5,6 +5,9 @@ import numpy as np
 from collections import deque
 import random
 import os
+import shutil
+
+from models.replay_buffer import MemmapReplayBuffer
 
 class DQNetwork(nn.Module):
     def __init__(self, state_size, action_size):
@@ -26,13 +29,22 @@ class DQNetwork(nn.Module):
         x = torch.relu(self.fc3(x))
         return self.fc4(x)
 
+def replay_path(checkpoint_path):
+    """Replay buffer directory saved next to a checkpoint"""
+    return os.path.splitext(checkpoint_path)[0] + '_replay'
+
 class MaintenanceAgent:
     def __init__(self, state_size, action_size, learning_rate=0.001, gamma=0.95,
                  epsilon_start=1.0, epsilon_min=0.01, epsilon_decay=0.995,
-                 memory_size=10000, batch_size=64, target_update=10):
+                 memory_size=10000, batch_size=64, target_update=10, replay_dir=None):
         self.state_size = state_size
         self.action_size = action_size
-        self.memory = deque(maxlen=memory_size)
+        # In RAM by default; with replay_dir a memory-mapped buffer that is
+        # resumed if it already exists there
+        if replay_dir:
+            self.memory = MemmapReplayBuffer(replay_dir, capacity=memory_size, state_size=state_size)
+        else:
+            self.memory = deque(maxlen=memory_size)
         self.gamma = gamma
         self.epsilon = epsilon_start
         self.epsilon_min = epsilon_min
@@ -72,12 +84,20 @@ class MaintenanceAgent:
             return 0
         
         # Sample random batch from memory
-        batch = random.sample(self.memory, self.batch_size)
-        states = torch.FloatTensor([i[0] for i in batch]).to(self.device)
-        actions = torch.LongTensor([i[1] for i in batch]).to(self.device)
-        rewards = torch.FloatTensor([i[2] for i in batch]).to(self.device)
-        next_states = torch.FloatTensor([i[3] for i in batch]).to(self.device)
-        dones = torch.FloatTensor([i[4] for i in batch]).to(self.device)
+        if isinstance(self.memory, MemmapReplayBuffer):
+            states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+            states = torch.from_numpy(states).to(self.device)
+            actions = torch.from_numpy(actions).to(self.device)
+            rewards = torch.from_numpy(rewards).to(self.device)
+            next_states = torch.from_numpy(next_states).to(self.device)
+            dones = torch.from_numpy(dones).float().to(self.device)
+        else:
+            batch = random.sample(self.memory, self.batch_size)
+            states = torch.FloatTensor([i[0] for i in batch]).to(self.device)
+            actions = torch.LongTensor([i[1] for i in batch]).to(self.device)
+            rewards = torch.FloatTensor([i[2] for i in batch]).to(self.device)
+            next_states = torch.FloatTensor([i[3] for i in batch]).to(self.device)
+            dones = torch.FloatTensor([i[4] for i in batch]).to(self.device)
         
         # Current Q values
         current_q_values = self.policy_net(states).gather(1, actions.unsqueeze(1))
@@ -103,27 +123,67 @@ class MaintenanceAgent:
         
         return loss.item()
     
-    def save(self, path='models/saved/maintenance_dqn.pth'):
-        """Save model weights"""
+    def save(self, path='models/saved/maintenance_dqn.pth', metadata=None):
+        """Save model weights and training state (and persist a memory-mapped replay buffer).
+
+        metadata is a dict stored alongside, e.g. training progress for resuming.
+        """
+        if isinstance(self.memory, MemmapReplayBuffer):
+            self.memory.flush()
         os.makedirs(os.path.dirname(path), exist_ok=True)
         torch.save({
             'policy_net_state_dict': self.policy_net.state_dict(),
             'target_net_state_dict': self.target_net.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
-            'epsilon': self.epsilon
+            'epsilon': self.epsilon,
+            'update_counter': self.update_counter,
+            'metadata': metadata or {}
         }, path)
     
     def load(self, path='models/saved/maintenance_dqn.pth'):
-        """Load model weights"""
+        """Load model weights and training state; returns the saved metadata, or None without a checkpoint"""
         if os.path.exists(path):
             checkpoint = torch.load(path)
             self.policy_net.load_state_dict(checkpoint['policy_net_state_dict'])
             self.target_net.load_state_dict(checkpoint['target_net_state_dict'])
             self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
             self.epsilon = checkpoint['epsilon']
+            self.update_counter = checkpoint.get('update_counter', 0)
             print(f"Model loaded from {path}")
+            return checkpoint.get('metadata', {})
         else:
             print(f"No model found at {path}")
+            return None
+
+    def save_memory(self, path):
+        """Save the replay buffer as a memory-mapped buffer directory"""
+        if isinstance(self.memory, MemmapReplayBuffer) and os.path.abspath(self.memory.directory) == os.path.abspath(path):
+            self.memory.flush()
+            return
+
+        # Build the copy next to the target and swap it in
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if isinstance(self.memory, MemmapReplayBuffer):
+            # File-level copy; the buffer may be larger than RAM
+            self.memory.copy_to(tmp_path)
+        else:
+            buffer = MemmapReplayBuffer(tmp_path, capacity=self.memory.maxlen, state_size=self.state_size)
+            buffer.extend(self.memory)
+            buffer.flush()
+            del buffer
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(tmp_path, path)
+
+    def load_memory(self, path):
+        """Append a saved replay buffer to memory"""
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            print(f"No replay buffer found at {path}")
+            return
+        if isinstance(self.memory, MemmapReplayBuffer) and os.path.abspath(self.memory.directory) == os.path.abspath(path):
+            return
+        self.memory.extend(MemmapReplayBuffer(path, state_size=self.state_size))
+        print(f"Replay buffer loaded from {path} ({len(self.memory)} transitions)")
 
     def predict_maintenance(self, states):
         """Predict maintenance decisions for multiple equipment states"""
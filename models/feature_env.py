@@ -0,0 +1,164 @@
+import gym
+import numpy as np
+from datetime import datetime
+from gym import spaces
+
+from models.fleet_features import FleetFeatures, DAY_NS, date_ns, equipment_rows
+
+# MaintenanceEnv compares the episode date against a later datetime.now(), so
+# its episodes end once the date has advanced by more than 30 days
+EPISODE_DAYS = 30
+
+
+def maintenance_rewards(states, actions, cost_over_budget):
+    """Vectorized MaintenanceEnv.step reward for a batch of states and actions"""
+    breakdown_risk = states[:, 5]
+    issue_priority = states[:, 6]
+
+    # Schedule maintenance
+    maintain_reward = np.where(
+        (breakdown_risk > 0.7) | (issue_priority > 0.7),
+        100 + np.where(issue_priority > 0.9, 50, 0),  # Extra reward for addressing critical issues
+        -50  # Unnecessary maintenance
+    ) + -20 * cost_over_budget
+
+    # Postpone maintenance
+    postpone_reward = np.where((breakdown_risk > 0.9) | (issue_priority > 0.8), -200, 10)
+
+    return np.where(np.asarray(actions) == 1, maintain_reward, postpone_reward)
+
+
+class FeatureMaintenanceEnv(gym.Env):
+    """MaintenanceEnv equivalent backed by precomputed FleetFeatures arrays.
+
+    Same spaces, episode sampling, states and rewards as MaintenanceEnv, but
+    each step is a handful of array lookups instead of DataFrame filters. All
+    inputs are plain numpy arrays (see to_arrays/from_arrays), so several
+    processes can train on one memory-mapped copy of the dataset.
+    """
+
+    ISSUE_ARRAYS = ['issue_priority', 'has_issues', 'issue_rows']
+
+    def __init__(self, features, issue_priority, has_issues, issue_rows, seed=None):
+        super(FeatureMaintenanceEnv, self).__init__()
+
+        self.features = features
+        self.issue_priority = issue_priority
+        self.has_issues = has_issues
+        self.issue_rows = issue_rows  # Equipment row of every current issue
+        self.cost_over_budget = features.estimated_costs() / features.arrays['maintenance_cost_budget']
+        self.rng = np.random.default_rng(seed)
+
+        self.action_space = spaces.Discrete(2)
+        self.observation_space = spaces.Box(
+            low=np.array([0, 0, 0, 0, 0, 0, 0, 0]),
+            high=np.array([365, 3650, 1, 1, 1, 1, 1, 1]),
+            dtype=np.float32
+        )
+
+        self.reset()
+
+    @classmethod
+    def from_frames(cls, equipment_df, history_df, current_issues_df, seed=None):
+        features = FleetFeatures.from_frames(equipment_df, history_df)
+        issue_priority, has_issues = features.issue_aggregates(current_issues_df)
+
+        # MaintenanceEnv.reset looks the sampled issue's equipment up by equipment_id
+        issue_rows = equipment_rows(equipment_df, current_issues_df['equipment_id'].values)
+
+        return cls(features, issue_priority, has_issues, issue_rows, seed=seed)
+
+    def to_arrays(self):
+        """All arrays needed to rebuild this env, e.g. for shared_state.publish_arrays"""
+        arrays = dict(self.features.arrays)
+        arrays['labels'] = np.arange(len(self.features))
+        arrays.update({
+            'issue_priority': np.asarray(self.issue_priority, dtype=np.float64),
+            'has_issues': np.asarray(self.has_issues, dtype=bool),
+            'issue_rows': np.asarray(self.issue_rows, dtype=np.int64),
+        })
+        return arrays
+
+    @classmethod
+    def array_names(cls):
+        return FleetFeatures.EQUIPMENT_ARRAYS + FleetFeatures.FLEET_ARRAYS + ['labels'] + cls.ISSUE_ARRAYS
+
+    @classmethod
+    def from_arrays(cls, arrays, seed=None):
+        features = FleetFeatures(arrays['labels'], {
+            name: arrays[name] for name in FleetFeatures.EQUIPMENT_ARRAYS + FleetFeatures.FLEET_ARRAYS
+        })
+        return cls(features, arrays['issue_priority'], arrays['has_issues'], arrays['issue_rows'], seed=seed)
+
+    def reset(self):
+        """Reset environment to initial state"""
+        self.start_ns = date_ns(datetime.now())
+        self.day = 0
+        # Select random equipment with active issues
+        if len(self.issue_rows) > 0:
+            self.current_row = int(self.issue_rows[self.rng.integers(len(self.issue_rows))])
+        else:
+            self.current_row = int(self.rng.integers(len(self.features)))
+
+        return self._get_state()
+
+    def step(self, action):
+        """
+        Take action in environment
+        action: 0 = postpone, 1 = schedule maintenance
+        """
+        state = self._get_state()
+        row = slice(self.current_row, self.current_row + 1)
+        reward = float(maintenance_rewards(state[None, :], [action], self.cost_over_budget[row])[0])
+
+        # Move to next day
+        self.day += 1
+        next_state = self._get_state()
+
+        # Episode ends after 30 days or if equipment fails
+        done = self.day > EPISODE_DAYS or state[5] > 0.95
+
+        return next_state, reward, done, {}
+
+    def sample_start_rows(self, num_episodes):
+        """Draw episode start equipment rows the way reset() does"""
+        if len(self.issue_rows) > 0:
+            return np.asarray(self.issue_rows)[self.rng.integers(len(self.issue_rows), size=num_episodes)]
+        return self.rng.integers(len(self.features), size=num_episodes)
+
+    def rollout(self, policy, start_rows, start_date=None):
+        """Play one episode per start row in lockstep, batching every step.
+
+        policy maps an (n, 8) state matrix to n actions. Returns per-episode
+        total reward, number of steps and number of maintenance actions.
+        """
+        start_ns = date_ns(start_date or datetime.now())
+        rows = np.asarray(start_rows, dtype=np.int64)
+        total_rewards = np.zeros(len(rows))
+        steps = np.zeros(len(rows), dtype=np.int64)
+        maintenance_actions = np.zeros(len(rows), dtype=np.int64)
+        active = np.arange(len(rows))
+
+        day = 0
+        while len(active) > 0:
+            states = self.features.compute_states(
+                start_ns + day * DAY_NS, self.issue_priority, self.has_issues, rows=rows[active]
+            )
+            actions = np.asarray(policy(states))
+            total_rewards[active] += maintenance_rewards(states, actions, self.cost_over_budget[rows[active]])
+            steps[active] += 1
+            maintenance_actions[active] += actions == 1
+
+            day += 1
+            done = (states[:, 5] > 0.95) | (day > EPISODE_DAYS)
+            active = active[~done]
+
+        return total_rewards, steps, maintenance_actions
+
+    def _get_state(self):
+        return self.features.compute_states(
+            self.start_ns + self.day * DAY_NS,
+            self.issue_priority,
+            self.has_issues,
+            rows=[self.current_row]
+        )[0]
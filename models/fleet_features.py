@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+DAY_NS = 86_400 * 10**9
+NAT_NS = np.iinfo(np.int64).min
+
+CRITICALITY_SCORES = {'A': 1.0, 'B': 0.6, 'C': 0.3}
+
+
+def _to_ns(values):
+    """Convert date-like values to int64 nanoseconds (NaT -> NAT_NS)"""
+    return pd.to_datetime(pd.Series(values)).values.astype('datetime64[ns]').astype(np.int64)
+
+
+def date_ns(current_date):
+    """Nanoseconds since the epoch for a datetime (ints are passed through)"""
+    if isinstance(current_date, (int, np.integer)):
+        return int(current_date)
+    return pd.Timestamp(current_date).value
+
+
+def equipment_keys(equipment_df):
+    """Ids that join equipment to history and issues: the equipment_id column, or the index without one"""
+    if 'equipment_id' in equipment_df.columns:
+        return pd.Index(equipment_df['equipment_id'].values)
+    return equipment_df.index
+
+
+def equipment_rows(equipment_df, equipment_ids):
+    """Row position of the first equipment with each id; ids that are not found are dropped"""
+    first_row = pd.Series(np.arange(len(equipment_df)), index=equipment_df['equipment_id'].values)
+    first_row = first_row[~first_row.index.duplicated()]
+    return first_row.reindex(np.asarray(equipment_ids)).dropna().values.astype(np.int64)
+
+
+class FleetFeatures:
+    """Per-equipment feature arrays for vectorized state computation.
+
+    Holds the history and equipment master aggregates behind
+    MaintenanceEnv._get_state as flat numpy arrays (one entry per equipment
+    row), so states for a whole fleet can be computed in a few array
+    operations. Equipment is matched to history and issues by its
+    equipment_keys, exactly like MaintenanceEnv; labels are the equipment
+    frame's index, used to label scored rows.
+    """
+
+    # Per-equipment arrays, aligned with labels
+    EQUIPMENT_ARRAYS = [
+        'installation_ns', 'maintenance_cycle', 'criticality_score',
+        'maintenance_cost_budget', 'last_maintenance_ns', 'history_count', 'mean_cost'
+    ]
+    # Fleet-wide arrays
+    FLEET_ARRAYS = ['history_start_ns']
+
+    def __init__(self, labels, arrays, keys=None):
+        self.labels = pd.Index(labels)
+        self.keys = self.labels if keys is None else pd.Index(keys)
+        self.arrays = arrays
+
+    @classmethod
+    def from_frames(cls, equipment_df, history_df):
+        """Precompute feature arrays from equipment master and history frames"""
+        keys = equipment_keys(equipment_df)
+        equipment_ids = history_df['equipment_id']
+
+        history_count = equipment_ids.groupby(equipment_ids).size().reindex(keys, fill_value=0)
+        mean_cost = history_df['actual_cost'].groupby(equipment_ids).mean().reindex(keys)
+        last_end = pd.to_datetime(history_df['end_date']).groupby(equipment_ids).max().reindex(keys)
+
+        history_start_ns = _to_ns(history_df['start_date'])
+        history_start_ns = np.sort(history_start_ns[history_start_ns != NAT_NS])
+
+        arrays = {
+            'installation_ns': _to_ns(equipment_df['installation_date']),
+            'maintenance_cycle': equipment_df['maintenance_cycle'].values.astype(np.float64),
+            'criticality_score': equipment_df['criticality'].map(CRITICALITY_SCORES).values.astype(np.float64),
+            'maintenance_cost_budget': equipment_df['maintenance_cost_budget'].values.astype(np.float64),
+            'last_maintenance_ns': _to_ns(last_end.values),
+            'history_count': history_count.values.astype(np.int64),
+            'mean_cost': mean_cost.values.astype(np.float64),
+            'history_start_ns': history_start_ns,
+        }
+        return cls(equipment_df.index, arrays, keys)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def valid(self):
+        """Rows the env could compute a state for (known criticality rating)"""
+        return ~np.isnan(self.arrays['criticality_score'])
+
+    def issue_aggregates(self, issues_df):
+        """Max issue priority score and has-issue flag per equipment row"""
+        if len(issues_df) == 0:
+            return np.zeros(len(self)), np.zeros(len(self), dtype=bool)
+
+        # Priority 1=Highest -> 1.0, 4=Lowest -> 0.25
+        priority_scores = 1.25 - issues_df['priority'].astype(int) * 0.25
+        max_scores = priority_scores.groupby(issues_df['equipment_id']).max().reindex(self.keys)
+        has_issues = max_scores.notna().values
+        return np.where(has_issues, max_scores.values, 0.0), has_issues
+
+    def workload_factor(self, current_date):
+        """Fleet-wide maintenance workload in a +/- 7 day window"""
+        current_ns = date_ns(current_date)
+        starts = self.arrays['history_start_ns']
+        window_start = np.searchsorted(starts, current_ns - 7 * DAY_NS, side='left')
+        window_end = np.searchsorted(starts, current_ns + 7 * DAY_NS, side='right')
+        daily_count = (window_end - window_start) / 15  # 15 days window
+        return min(daily_count / 5, 1.0)  # Normalize assuming max 5 maintenances per day
+
+    def states(self, issues_df, current_date):
+        """Compute the (N, 8) state matrix, matching MaintenanceEnv._get_state.
+
+        Rows that are not valid (see `valid`) contain NaN.
+        """
+        issue_priority, has_issues = self.issue_aggregates(issues_df)
+        return self.compute_states(current_date, issue_priority, has_issues)
+
+    def compute_states(self, current_date, issue_priority, has_issues, rows=None):
+        """State matrix from precomputed issue aggregates, optionally for a subset of rows.
+
+        current_date may be a datetime or int64 nanoseconds since the epoch.
+        """
+        a = self.arrays
+        select = slice(None) if rows is None else rows
+        current_ns = date_ns(current_date)
+
+        history_count = a['history_count'][select]
+        has_history = history_count > 0
+        last_maintenance_ns = np.where(has_history, a['last_maintenance_ns'][select], current_ns)
+        days_since_maintenance = np.where(
+            has_history,
+            (current_ns - last_maintenance_ns) // DAY_NS,
+            365  # Max value if no maintenance history
+        ).astype(np.float64)
+        equipment_age = ((current_ns - a['installation_ns'][select]) // DAY_NS).astype(np.float64)
+        cycle = a['maintenance_cycle'][select]
+        budget = a['maintenance_cost_budget'][select]
+        criticality_score = a['criticality_score'][select]
+
+        cost_ratio = np.where(has_history, np.minimum(a['mean_cost'][select] / budget, 1.0), 0.5)
+
+        issue_priority = np.asarray(issue_priority)[select]
+        has_issues = np.asarray(has_issues)[select]
+        base_risk = np.minimum(days_since_maintenance / cycle, 1.0)
+        age_factor = np.minimum(equipment_age / 365 / 10, 1.0)
+        breakdown_risk = np.minimum(base_risk + 0.3 * age_factor + np.where(has_issues, 0.2, 0), 1.0)
+
+        states = np.column_stack([
+            days_since_maintenance / 365,
+            equipment_age / 3650,
+            criticality_score,
+            days_since_maintenance / cycle,
+            cost_ratio,
+            breakdown_risk,
+            issue_priority,
+            np.full(len(cycle), self.workload_factor(current_ns))
+        ]).astype(np.float32)
+        states[np.isnan(criticality_score)] = np.nan
+        return states
+
+    def estimated_costs(self):
+        """Estimated maintenance cost per row, matching MaintenanceEnv._estimate_maintenance_cost"""
+        has_history = self.arrays['history_count'] > 0
+        return np.where(has_history, self.arrays['mean_cost'], self.arrays['maintenance_cost_budget'] * 0.5)
@@ -1,14 +1,55 @@
+import bisect
 import gym
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from gym import spaces
 
+from models.fleet_features import FleetFeatures, DAY_NS, equipment_keys
+
+# Names of the state vector entries returned by MaintenanceEnv._get_state
+STATE_FEATURES = [
+    'days_since_maintenance', 'equipment_age', 'criticality_score',
+    'maintenance_cycle_completion', 'cost_ratio', 'breakdown_risk',
+    'issue_priority', 'workload_factor'
+]
+
+# How reset() picks the equipment of a new episode
+SAMPLING_MODES = ['issues', 'risk', 'uniform']
+
+# Episode starts drawn per batch from the env's random generator
+EPISODE_BATCH_SIZE = 1024
+
 class MaintenanceEnv(gym.Env):
-    def __init__(self, equipment_df, history_df, current_issues_df):
+    """Maintenance scheduling environment over SAP PM equipment, history and issues.
+
+    Per-equipment history and issue aggregates are kept alongside the frames,
+    so states never filter the full frames and live updates (add_work_orders,
+    close_issue, upsert_issues) cost O(changed rows), plus a search among the
+    work orders started on the same day. The frames themselves are rebuilt
+    lazily the next time history_df or current_issues_df is read.
+
+    Episode starts follow per-equipment weights (see episode_weights):
+    'issues' weights equipment by its number of open issues (the original
+    behaviour), 'risk' by current breakdown risk and 'uniform' treats the
+    fleet equally. 'issues' picks a random open issue and then its equipment,
+    so issue updates never force the weights to be recomputed. The other
+    modes draw starts in batches from precomputed weights.
+    """
+
+    def __init__(self, equipment_df, history_df, current_issues_df, sampling='issues', seed=None):
         super(MaintenanceEnv, self).__init__()
         
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"sampling must be one of {', '.join(SAMPLING_MODES)}, got '{sampling}'")
+        self.sampling = sampling
+        self.rng = np.random.default_rng(seed)
+        
         self.equipment_df = equipment_df
+        # Row of the first equipment with each key, for issue sampling
+        self._equipment_row = {}
+        for row, key in enumerate(equipment_keys(equipment_df)):
+            self._equipment_row.setdefault(key, row)
         self.history_df = history_df
         self.current_issues_df = current_issues_df
         self.current_date = datetime.now()
@@ -27,17 +68,196 @@ class MaintenanceEnv(gym.Env):
         
         self.reset()
         
+    @property
+    def history_df(self):
+        if self._pending_work_orders:
+            self._history_frame = pd.concat(
+                [self._history_frame] + self._pending_work_orders, ignore_index=True
+            )
+            self._pending_work_orders = []
+        return self._history_frame
+
+    @history_df.setter
+    def history_df(self, history_df):
+        self._history_frame = history_df
+        self._pending_work_orders = []
+        self._invalidate_episode_sampler()
+
+        # Per equipment: work order count, cost sum/count (NaN costs are
+        # skipped like in mean()) and latest end date
+        equipment_ids = history_df['equipment_id']
+        costs = history_df['actual_cost']
+        stats = pd.DataFrame({
+            'count': equipment_ids.groupby(equipment_ids).size(),
+            'cost_sum': costs.groupby(equipment_ids).sum(),
+            'cost_count': costs.groupby(equipment_ids).count(),
+            'last_end': pd.to_datetime(history_df['end_date']).groupby(equipment_ids).max(),
+        })
+        self._history_stats = stats.to_dict('index')
+
+        # Sorted work order start dates for the workload window, per day so
+        # that adding one only searches the orders started on that day
+        starts = pd.to_datetime(history_df['start_date']).dropna()
+        self._history_starts = {}
+        for start in np.sort(starts.values.astype('datetime64[ns]').astype(np.int64)).tolist():
+            self._history_starts.setdefault(start // DAY_NS, []).append(start)
+
+    @property
+    def current_issues_df(self):
+        if self._issue_updates:
+            kept = self._issues_frame
+            if 'notification_id' in kept:
+                kept = kept[~kept['notification_id'].isin(list(self._issue_updates))]
+            upserted = [record for record in self._issue_updates.values() if record is not None]
+            frames = [kept, pd.DataFrame(upserted)] if upserted else [kept]
+            self._issues_frame = pd.concat(frames, ignore_index=True)
+            self._issue_updates = {}
+        return self._issues_frame
+
+    @current_issues_df.setter
+    def current_issues_df(self, current_issues_df):
+        self._issues_frame = current_issues_df
+        self._issue_updates = {}  # notification_id -> upserted record, or None once closed
+        self._invalidate_episode_sampler()
+
+        # Count of open issues per equipment and priority, the equipment row
+        # of every open issue on known equipment (sampled by reset) and the
+        # (equipment_id, priority, row entry) of every notification
+        self._issue_priorities = {}
+        self._issue_entries = []
+        self._open_issues = {}
+        if 'notification_id' in current_issues_df:
+            keys = current_issues_df['notification_id']
+        else:
+            keys = [None] * len(current_issues_df)
+        priorities = current_issues_df['priority'].astype(int) if len(current_issues_df) else []
+        for key, equipment_id, priority in zip(keys, current_issues_df['equipment_id'], priorities):
+            self._add_issue(key, equipment_id, priority)
+
+    def add_work_orders(self, work_orders):
+        """Add completed work orders (DataFrame or list of dicts shaped like history_df rows)"""
+        work_orders = pd.DataFrame(work_orders)
+        if work_orders.empty:
+            return
+        self._pending_work_orders.append(work_orders)
+        if self.sampling == 'risk':
+            self._invalidate_episode_sampler()
+
+        end_dates = pd.to_datetime(work_orders['end_date'])
+        start_dates = pd.to_datetime(work_orders['start_date'])
+        for equipment_id, cost, end_date, start_date in zip(
+            work_orders['equipment_id'], work_orders['actual_cost'], end_dates, start_dates
+        ):
+            if pd.isna(equipment_id):
+                continue
+            stats = self._history_stats.setdefault(
+                equipment_id, {'count': 0, 'cost_sum': 0.0, 'cost_count': 0, 'last_end': pd.NaT}
+            )
+            stats['count'] += 1
+            if not pd.isna(cost):
+                stats['cost_sum'] += cost
+                stats['cost_count'] += 1
+            if not pd.isna(end_date) and (pd.isna(stats['last_end']) or end_date > stats['last_end']):
+                stats['last_end'] = end_date
+            if not pd.isna(start_date):
+                bisect.insort(self._history_starts.setdefault(start_date.value // DAY_NS, []), start_date.value)
+
+    def close_issue(self, notification_id):
+        """Remove an open notification; returns False if it was not open"""
+        if notification_id not in self._open_issues:
+            return False
+        for equipment_id, priority, entry in self._open_issues.pop(notification_id):
+            self._remove_issue(equipment_id, priority, entry)
+        self._issue_updates[notification_id] = None
+        if self.sampling == 'risk':
+            self._invalidate_episode_sampler()
+        return True
+
+    def upsert_issues(self, issues):
+        """Add new notifications or replace existing ones, matched on notification_id"""
+        issues = pd.DataFrame(issues)
+        if issues.empty:
+            return
+        if 'notification_id' not in issues:
+            raise ValueError("upsert_issues requires a 'notification_id' column")
+
+        for record in issues.to_dict('records'):
+            key = record['notification_id']
+            for equipment_id, priority, entry in self._open_issues.pop(key, []):
+                self._remove_issue(equipment_id, priority, entry)
+            self._add_issue(key, record['equipment_id'], int(record['priority']))
+            self._issue_updates[key] = record
+        if self.sampling == 'risk':
+            self._invalidate_episode_sampler()
+
+    def _add_issue(self, key, equipment_id, priority):
+        counts = self._issue_priorities.setdefault(equipment_id, {})
+        counts[priority] = counts.get(priority, 0) + 1
+        # [equipment row, position in _issue_entries], so removal is a swap with the last entry
+        row = self._equipment_row.get(equipment_id)
+        entry = None
+        if row is not None:
+            entry = [row, len(self._issue_entries)]
+            self._issue_entries.append(entry)
+        if key is not None:
+            self._open_issues.setdefault(key, []).append((equipment_id, priority, entry))
+
+    def _remove_issue(self, equipment_id, priority, entry):
+        counts = self._issue_priorities[equipment_id]
+        counts[priority] -= 1
+        if counts[priority] == 0:
+            del counts[priority]
+        if not counts:
+            del self._issue_priorities[equipment_id]
+        if entry is not None:
+            last = self._issue_entries.pop()
+            if last is not entry:
+                self._issue_entries[entry[1]] = last
+                last[1] = entry[1]
+
+    def episode_weights(self):
+        """Probability of each equipment row starting an episode under the sampling mode"""
+        weights = np.zeros(len(self.equipment_df))
+        if self.sampling == 'issues':
+            # Same as picking a random issue and then its equipment
+            rows = np.array([entry[0] for entry in self._issue_entries], dtype=np.int64)
+            weights = np.bincount(rows, minlength=len(weights)).astype(np.float64)
+        elif self.sampling == 'risk':
+            features = FleetFeatures.from_frames(self.equipment_df, self.history_df)
+            risk = features.states(self.current_issues_df, datetime.now())[:, STATE_FEATURES.index('breakdown_risk')]
+            # Work orders ending in the future (planned ones) give negative risk
+            weights = np.maximum(np.nan_to_num(risk), 0.0)
+
+        if weights.sum() <= 0:
+            # Uniform mode, or nothing to weight by (e.g. no open issues)
+            weights = np.ones(len(weights))
+        return weights / weights.sum()
+
+    def _invalidate_episode_sampler(self):
+        self._episode_weights = None
+        self._episode_starts = None
+
+    def _next_episode_row(self):
+        """Next episode start: the equipment of a random open issue in 'issues'
+        mode, otherwise the next precomputed start, drawing a new batch when used up"""
+        if self.sampling == 'issues' and self._issue_entries:
+            return self._issue_entries[self.rng.integers(len(self._issue_entries))][0]
+        if self._episode_starts is None or self._episode_cursor >= len(self._episode_starts):
+            if self._episode_weights is None:
+                self._episode_weights = self.episode_weights()
+            self._episode_starts = self.rng.choice(
+                len(self._episode_weights), size=EPISODE_BATCH_SIZE, p=self._episode_weights
+            )
+            self._episode_cursor = 0
+        row = self._episode_starts[self._episode_cursor]
+        self._episode_cursor += 1
+        return row
+
     def reset(self):
         """Reset environment to initial state"""
         self.current_date = datetime.now()
-        # Select random equipment with active issues
-        if len(self.current_issues_df) > 0:
-            issue = self.current_issues_df.sample(1).iloc[0]
-            self.current_equipment = self.equipment_df[
-                self.equipment_df['equipment_id'] == issue['equipment_id']
-            ].iloc[0]
-        else:
-            self.current_equipment = self.equipment_df.sample(1).iloc[0]
+        # Select random equipment, weighted by the sampling mode
+        self.current_equipment = self.equipment_df.iloc[self._next_episode_row()]
             
         return self._get_state()
         
@@ -109,19 +329,19 @@ class MaintenanceEnv(gym.Env):
             workload_factor
         ], dtype=np.float32)
         
+    def _equipment_key(self):
+        """Id joining the current equipment to history and issues (see fleet_features.equipment_keys)"""
+        if 'equipment_id' in self.current_equipment.index:
+            return self.current_equipment['equipment_id']
+        return self.current_equipment.name
+
     def _get_days_since_last_maintenance(self):
         """Calculate days since last maintenance"""
-        relevant_history = self.history_df[
-            self.history_df['equipment_id'] == self.current_equipment.name
-        ]
-        if len(relevant_history) == 0:
+        stats = self._history_stats.get(self._equipment_key())
+        if stats is None:
             return 365  # Max value if no maintenance history
             
-        last_maintenance = pd.to_datetime(
-            relevant_history['end_date']
-        ).max()
-        
-        return (self.current_date - last_maintenance).days
+        return (self.current_date - stats['last_end']).days
         
     def _get_criticality_score(self):
         """Convert equipment criticality to score"""
@@ -130,14 +350,16 @@ class MaintenanceEnv(gym.Env):
         
     def _get_cost_ratio(self):
         """Calculate maintenance cost ratio"""
-        relevant_history = self.history_df[
-            self.history_df['equipment_id'] == self.current_equipment.name
-        ]
-        if len(relevant_history) == 0:
+        stats = self._history_stats.get(self._equipment_key())
+        if stats is None:
             return 0.5
             
-        avg_cost = relevant_history['actual_cost'].mean()
+        avg_cost = self._mean_cost(stats)
         return min(avg_cost / self.current_equipment['maintenance_cost_budget'], 1.0)
+
+    def _mean_cost(self, stats):
+        """Mean actual cost of an equipment's work orders (NaN if no cost was recorded)"""
+        return stats['cost_sum'] / stats['cost_count'] if stats['cost_count'] else np.nan
         
     def _calculate_breakdown_risk(self):
         """Calculate risk of breakdown"""
@@ -150,9 +372,7 @@ class MaintenanceEnv(gym.Env):
         age_factor = min(age_years / 10, 1.0)  # Assumes 10 year expected lifetime
         
         # Increase risk if there are current issues
-        has_issues = len(self.current_issues_df[
-            self.current_issues_df['equipment_id'] == self.current_equipment.name
-        ]) > 0
+        has_issues = self._equipment_key() in self._issue_priorities
         
         issue_factor = 0.2 if has_issues else 0
         
@@ -160,36 +380,32 @@ class MaintenanceEnv(gym.Env):
         
     def _get_issue_priority(self):
         """Get priority score of current issues"""
-        current_issues = self.current_issues_df[
-            self.current_issues_df['equipment_id'] == self.current_equipment.name
-        ]
+        counts = self._issue_priorities.get(self._equipment_key())
         
-        if len(current_issues) == 0:
+        if not counts:
             return 0.0
             
         # Convert priority to score (1=Highest -> 1.0, 4=Lowest -> 0.25)
-        priority_scores = current_issues['priority'].astype(int).map(lambda x: 1.25 - (x * 0.25))
-        return float(priority_scores.max())
+        return float(1.25 - (min(counts) * 0.25))
         
     def _get_workload_factor(self):
         """Calculate maintenance workload factor for current date"""
-        window_start = self.current_date - timedelta(days=7)
-        window_end = self.current_date + timedelta(days=7)
+        window_start = pd.Timestamp(self.current_date - timedelta(days=7)).value
+        window_end = pd.Timestamp(self.current_date + timedelta(days=7)).value
         
-        scheduled_maintenance = self.history_df[
-            (pd.to_datetime(self.history_df['start_date']) >= window_start) &
-            (pd.to_datetime(self.history_df['start_date']) <= window_end)
-        ]
+        scheduled_maintenance = 0
+        for day in range(window_start // DAY_NS, window_end // DAY_NS + 1):
+            starts = self._history_starts.get(day)
+            if starts:
+                scheduled_maintenance += bisect.bisect_right(starts, window_end) - bisect.bisect_left(starts, window_start)
         
-        daily_count = len(scheduled_maintenance) / 15  # 15 days window
+        daily_count = scheduled_maintenance / 15  # 15 days window
         return min(daily_count / 5, 1.0)  # Normalize assuming max 5 maintenances per day
         
     def _estimate_maintenance_cost(self):
         """Estimate cost of maintenance based on history"""
-        relevant_history = self.history_df[
-            self.history_df['equipment_id'] == self.current_equipment.name
-        ]
-        if len(relevant_history) == 0:
+        stats = self._history_stats.get(self._equipment_key())
+        if stats is None:
             return self.current_equipment['maintenance_cost_budget'] * 0.5
             
-        return relevant_history['actual_cost'].mean()
\ No newline at end of file
+        return self._mean_cost(stats)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+class PolicyEnsemble:
+    """A primary scoring policy plus shadow policies scored on the same states.
+
+    Members with a DQNetwork policy_net (agents, SharedFleet) are stacked
+    into per-layer weight tensors, so all of them score a batch with one
+    batched matmul per layer instead of one forward pass each. Other members
+    (distilled lookup tables) are queried one by one. predict_maintenance
+    returns the primary's decisions, so an ensemble can be used anywhere a
+    single policy is; predict_all returns every member's.
+    """
+
+    def __init__(self, policies, names=None):
+        if not policies:
+            raise ValueError("A policy ensemble needs at least one policy")
+        self.policies = list(policies)
+        self.names = list(names) if names is not None else [str(i) for i in range(len(self.policies))]
+
+        # Members sharing a network layout go into one stack
+        self.stacked = [i for i, policy in enumerate(self.policies) if getattr(policy, 'policy_net', None) is not None]
+        self.weights, self.biases = [], []
+        if self.stacked:
+            layers = [
+                [module for module in self.policies[i].policy_net.modules() if isinstance(module, nn.Linear)]
+                for i in self.stacked
+            ]
+            with torch.no_grad():
+                for depth in range(len(layers[0])):
+                    # (models, out, in) -> (models, in, out) so a layer is one baddbmm
+                    self.weights.append(torch.stack([l[depth].weight.detach().cpu() for l in layers]).transpose(1, 2))
+                    self.biases.append(torch.stack([l[depth].bias.detach().cpu() for l in layers]).unsqueeze(1))
+
+    def __len__(self):
+        return len(self.policies)
+
+    def _stacked_q_values(self, states):
+        """Q-values of all stacked members, shape (members, states, actions)"""
+        with torch.no_grad():
+            x = torch.from_numpy(np.array(states, dtype=np.float32))
+            x = x.unsqueeze(0).expand(len(self.stacked), -1, -1)
+            for depth, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+                x = torch.baddbmm(bias, x, weight)
+                if depth < len(self.weights) - 1:
+                    x = torch.relu(x)  # Same activations as DQNetwork.forward
+            return x
+
+    def predict_all(self, states):
+        """Decisions of every member: actions (members, states) and probabilities (members, states, 2)"""
+        states = np.asarray(states, dtype=np.float32)
+        actions = np.zeros((len(self), len(states)), dtype=np.int64)
+        probs = np.zeros((len(self), len(states), 2), dtype=np.float32)
+
+        if self.stacked:
+            q_values = self._stacked_q_values(states)
+            actions[self.stacked] = q_values.argmax(dim=2).numpy()
+            probs[self.stacked] = torch.softmax(q_values, dim=2).numpy()
+        for i, policy in enumerate(self.policies):
+            if i not in self.stacked:
+                actions[i], probs[i] = policy.predict_maintenance(states)
+        return actions, probs
+
+    def predict_maintenance(self, states):
+        """Same contract as MaintenanceAgent.predict_maintenance, for the primary policy"""
+        actions, probs = self.predict_all(states)
+        return actions[0], probs[0]
@@ -0,0 +1,136 @@
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+
+import numpy as np
+
+
+def transition_dtype(state_size):
+    """Fixed-width record of one (state, action, reward, next_state, done) transition"""
+    return np.dtype([
+        ('state', np.float32, (state_size,)),
+        ('action', np.int64),
+        ('reward', np.float32),
+        ('next_state', np.float32, (state_size,)),
+        ('done', np.bool_),
+    ])
+
+
+def _tuple_blocks(transitions, block_size, dtype):
+    """Pack an iterable of transition tuples into record arrays of up to block_size"""
+    iterator = iter(transitions)
+    while True:
+        block = list(itertools.islice(iterator, block_size))
+        if not block:
+            return
+        yield np.array(block, dtype=dtype)
+
+
+class MemmapReplayBuffer:
+    """Ring buffer of transitions stored in a memory-mapped .npy file.
+
+    Drop-in for the agent's deque memory (append, extend, len, iteration)
+    plus batched sample(). Records are contiguous and fixed-width, so a batch
+    is a single fancy-indexing read, and capacity is bounded by disk rather
+    than RAM. The fill level lives in meta.json; call flush() to persist it so
+    the buffer can be reopened after a restart.
+    """
+
+    def __init__(self, directory, capacity=10000, state_size=8):
+        self.directory = directory
+        self.data_path = os.path.join(directory, 'transitions.npy')
+        self.meta_path = os.path.join(directory, 'meta.json')
+
+        if os.path.exists(self.data_path) and os.path.exists(self.meta_path):
+            # Resume an existing buffer; its capacity and record layout win
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.records = np.lib.format.open_memmap(self.data_path, mode='r+')
+            if self.records.dtype != transition_dtype(state_size):
+                raise ValueError(f"Replay buffer at {directory} stores states of a different size")
+            self.size, self.position = meta['size'], meta['position']
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.records = np.lib.format.open_memmap(
+                self.data_path, mode='w+', dtype=transition_dtype(state_size), shape=(capacity,)
+            )
+            self.size, self.position = 0, 0
+            self.flush()
+
+    @property
+    def capacity(self):
+        return len(self.records)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        # Oldest to newest, like a deque
+        start = self.position if self.size == self.capacity else 0
+        for offset in range(self.size):
+            record = self.records[(start + offset) % self.capacity]
+            yield record['state'], int(record['action']), float(record['reward']), record['next_state'], bool(record['done'])
+
+    def blocks(self, block_size=65536):
+        """Stored records from oldest to newest as contiguous slices of the file"""
+        if self.size == self.capacity:
+            segments = [(self.position, self.capacity), (0, self.position)]
+        else:
+            segments = [(0, self.size)]
+        for begin, end in segments:
+            for start in range(begin, end, block_size):
+                yield self.records[start:min(start + block_size, end)]
+
+    def append(self, transition):
+        """Store a (state, action, reward, next_state, done) tuple, overwriting the oldest when full"""
+        self.records[self.position] = transition
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, transitions, block_size=65536):
+        """Append transition tuples, or every record of another buffer, a block at a time"""
+        if isinstance(transitions, MemmapReplayBuffer):
+            blocks = transitions.blocks(block_size)
+        else:
+            blocks = _tuple_blocks(transitions, block_size, self.records.dtype)
+        for block in blocks:
+            self._append_block(block)
+
+    def _append_block(self, block):
+        if len(block) >= self.capacity:
+            # Only the newest records fit; they fill the buffer in order
+            self.records[:] = block[-self.capacity:]
+            self.position, self.size = 0, self.capacity
+            return
+        first = min(len(block), self.capacity - self.position)
+        self.records[self.position:self.position + first] = block[:first]
+        self.records[:len(block) - first] = block[first:]
+        self.position = (self.position + len(block)) % self.capacity
+        self.size = min(self.size + len(block), self.capacity)
+
+    def copy_to(self, directory):
+        """Flush and copy the buffer files to another directory"""
+        self.flush()
+        os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(self.data_path, os.path.join(directory, 'transitions.npy'))
+        shutil.copyfile(self.meta_path, os.path.join(directory, 'meta.json'))
+
+    def sample(self, batch_size):
+        """Uniform random batch as (states, actions, rewards, next_states, dones) arrays"""
+        # Sorted indices turn the read into one forward pass over the file
+        indices = np.sort(random.sample(range(self.size), batch_size))
+        batch = self.records[indices]
+        return tuple(
+            np.ascontiguousarray(batch[field]) for field in ('state', 'action', 'reward', 'next_state', 'done')
+        )
+
+    def flush(self):
+        """Write buffered records to disk and persist the fill level"""
+        self.records.flush()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.json.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'size': self.size, 'position': self.position}, f)
+        os.replace(tmp_path, self.meta_path)
@@ -1,17 +1,18 @@
 from flask import Flask, request, jsonify, send_from_directory, send_file, make_response
 from flask_cors import CORS
-import pandas as pd
-import torch
-from datetime import datetime, timedelta
+from datetime import datetime
+import io
 import os
-import numpy as np
 import logging
+import threading
+import time
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 
-from models.maintenance_env import MaintenanceEnv
-from models.dqn_agent import MaintenanceAgent
-from utils.data_generator import MaintenanceDataGenerator
+# pandas, torch, sqlalchemy and the model code are imported lazily (see
+# import_heavy_modules) so the server can bind its port before they load
+from utils.schedule_export import ScheduleStore, EXPORT_FORMATS, negotiate_format
+from utils.schedule_query import ScheduleIndex, parse_schedule_query
+from utils.warmup import Warmup
 
 # Load environment variables
 load_dotenv()
@@ -21,51 +22,252 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": [os.environ.get('CORS_ORIGINS', 'http://localhost:8081'), os.environ.get('FRONTEND_URL', 'https://maintenance-scheduler-ui.azurestaticapps.net')]}})
+CORS(app, resources={r"/api/*": {"origins": [os.environ.get('CORS_ORIGINS', 'http://localhost:8081'), os.environ.get('FRONTEND_URL', 'https://maintenance-scheduler-ui.azurestaticapps.net')]}}, expose_headers=['X-Schedule-Id'])
 
 # Database configuration
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# Generated schedules and their on-demand exports. Results beyond the newest
+# SCHEDULER_MAX_RESULTS or older than SCHEDULER_RESULT_MAX_AGE_HOURS are
+# evicted with their exports and uploads
+schedule_store = ScheduleStore(
+    base_dir='data',
+    max_results=int(os.environ.get('SCHEDULER_MAX_RESULTS', '200')),
+    max_age=float(os.environ.get('SCHEDULER_RESULT_MAX_AGE_HOURS', '168')) * 3600
+)
+
+# Sharded scheduling: partition the fleet by this equipment column and score
+# each shard in a process pool (e.g. SCHEDULER_SHARD_KEY=functional_location)
+SHARD_KEY = os.environ.get('SCHEDULER_SHARD_KEY') or None
+SHARD_WORKERS = int(os.environ['SCHEDULER_SHARD_WORKERS']) if os.environ.get('SCHEDULER_SHARD_WORKERS') else None
+# A DQN checkpoint (.pth) or a distilled lookup table (.npz, see distill.py)
+MODEL_PATH = os.environ.get('SCHEDULER_MODEL_PATH', 'models/saved/maintenance_dqn_best.pth')
+# Shadow models (comma-separated paths) are scored on the same states as the
+# primary for A/B comparison; only the primary's decisions are served
+SHADOW_MODEL_PATHS = [path.strip() for path in os.environ.get('SCHEDULER_SHADOW_MODELS', '').split(',') if path.strip()]
+MODEL_PATHS = [MODEL_PATH] + SHADOW_MODEL_PATHS
+EQUIPMENT_PATH = 'data/sample_data/equipment_master.csv'
+HISTORY_PATH = 'data/sample_data/maintenance_history.csv'
+
+# Preload mode: policy weights and per-equipment feature arrays are published
+# to memory-mapped files once (in the gunicorn master when preload_app is on)
+# and every worker maps them read-only instead of holding its own copy
+PRELOAD = os.environ.get('SCHEDULER_PRELOAD', '').lower() in ('1', 'true', 'yes')
+SHARED_DIR = os.environ.get('SCHEDULER_SHARED_DIR')
+shared_fleet = None
+
+def import_heavy_modules():
+    """Import the heavy dependencies; later imports are cache lookups"""
+    import numpy
+    import pandas
+    import torch
+    import models.maintenance_env
+    import models.dqn_agent
+    import utils.fleet_scoring
+    import utils.schedule_rules
+    if DATABASE_URL:
+        import sqlalchemy
+
 def get_db():
     if DATABASE_URL:
+        from sqlalchemy import create_engine
         return create_engine(DATABASE_URL)
     return None
 
-# Initialize the model and agent
-def load_model():
-    db = get_db()
-    if db is not None:
-        equipment_df = pd.read_sql('SELECT * FROM equipment', db)
-        history_df = pd.read_sql('SELECT * FROM maintenance_history', db)
-        issues_df = pd.read_sql('SELECT * FROM current_issues', db)
-    else:
-        data_gen = MaintenanceDataGenerator(num_machines=1)
-        equipment_df, history_df, issues_df = data_gen.generate_all_data()
-    
-    # Initialize environment
-    env = MaintenanceEnv(equipment_df, history_df, issues_df)
-    state_size = env.observation_space.shape[0]
-    action_size = env.action_space.n
-    
-    # Initialize and load trained agent
-    agent = MaintenanceAgent(state_size, action_size)
-    agent.load('models/saved/maintenance_dqn_best.pth')
+# Trained agent, loaded once per process and reloaded if a checkpoint changes.
+# With shadow models this is a PolicyEnsemble with the primary first.
+_agent = None
+_agent_mtime = None
+_agent_lock = threading.Lock()
+
+def get_agent():
+    global _agent, _agent_mtime
+    mtime = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in MODEL_PATHS)
+    if _agent is None or mtime != _agent_mtime:
+        with _agent_lock:
+            if _agent is None or mtime != _agent_mtime:
+                from utils.fleet_scoring import load_policy
+                _agent, _agent_mtime = load_policy(MODEL_PATHS if SHADOW_MODEL_PATHS else MODEL_PATH), mtime
+    return _agent
+
+# Shadow policies alone, for workers whose primary is the preloaded shared
+# policy; loaded once per process and reloaded if a checkpoint changes
+_shadow_policies = None
+_shadow_mtime = None
+
+def get_shadow_policies():
+    global _shadow_policies, _shadow_mtime
+    mtime = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in SHADOW_MODEL_PATHS)
+    if _shadow_policies is None or mtime != _shadow_mtime:
+        with _agent_lock:
+            if _shadow_policies is None or mtime != _shadow_mtime:
+                from utils.fleet_scoring import load_policy
+                policies = [load_policy(path, required=True) for path in SHADOW_MODEL_PATHS]
+                _shadow_policies, _shadow_mtime = policies, mtime
+    return _shadow_policies
+
+# Running shadow model disagreement totals since the process started
+_shadow_stats = {}
+_shadow_stats_lock = threading.Lock()
+
+def record_shadow_disagreement(scored):
+    """Log how each shadow model's decisions differ from the served ones and add them to the totals"""
+    from utils.fleet_scoring import shadow_disagreement
     
-    return env, agent
+    for stats in shadow_disagreement(scored, MODEL_PATHS):
+        logger.info(f"Shadow model {stats['model']}: {stats['agreement']:.1%} agreement on "
+                    f"{stats['equipment']} equipment, {stats['added_maintenance']} added and "
+                    f"{stats['dropped_maintenance']} dropped maintenance actions, "
+                    f"confidence MAE {stats['confidence_mae']:.3f}")
+        with _shadow_stats_lock:
+            totals = _shadow_stats.setdefault(stats['model'], {
+                'requests': 0, 'equipment': 0, 'disagreements': 0,
+                'added_maintenance': 0, 'dropped_maintenance': 0
+            })
+            totals['requests'] += 1
+            for key in ('equipment', 'disagreements', 'added_maintenance', 'dropped_maintenance'):
+                totals[key] += stats[key]
+
+# Equipment master and history, cached until the file changes on disk.
+# Callers must treat the returned frames as read-only.
+_csv_cache = {}
+
+def read_csv_cached(path, **kwargs):
+    import pandas as pd
+    key = (path, tuple(sorted(kwargs.items())))
+    mtime = os.path.getmtime(path)
+    cached = _csv_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, pd.read_csv(path, **kwargs))
+        _csv_cache[key] = cached
+    return cached[1]
+
+# Query indexes of stored schedules. Results are immutable (content-hash ids),
+# so entries never go stale; only the most recently used ones are kept.
+_schedule_indexes = {}
+_schedule_indexes_lock = threading.Lock()
+MAX_CACHED_SCHEDULES = 16
+
+def get_schedule_index(result_id, records=None):
+    """Query index of a stored schedule; records skips reading a schedule that was just saved"""
+    with _schedule_indexes_lock:
+        index = _schedule_indexes.pop(result_id, None)
+    if index is None:
+        index = ScheduleIndex(records if records is not None else schedule_store.load_records(result_id))
+    with _schedule_indexes_lock:
+        _schedule_indexes[result_id] = index
+        while len(_schedule_indexes) > MAX_CACHED_SCHEDULES:
+            _schedule_indexes.pop(next(iter(_schedule_indexes)))
+    return index
 
 # Initialize database
 def init_db():
+    from utils.data_generator import cached_dataset
+    
     db = get_db()
     if db is not None:
-        data_gen = MaintenanceDataGenerator(num_machines=1)
-        equipment_df, history_df, issues_df = data_gen.generate_all_data()
+        equipment_df, history_df, issues_df = cached_dataset(num_machines=1)
         
         equipment_df.to_sql('equipment', db, if_exists='replace', index=False)
         history_df.to_sql('maintenance_history', db, if_exists='replace', index=False)
         issues_df.to_sql('current_issues', db, if_exists='replace', index=False)
 
+def preload_shared_fleet():
+    """Publish and attach the shared model and fleet feature arrays"""
+    global shared_fleet
+    import pandas as pd
+    from utils.shared_state import SharedFleet, default_shared_dir
+    
+    shared_dir = SHARED_DIR or default_shared_dir()
+    equipment_df = pd.read_csv(EQUIPMENT_PATH)
+    history_df = pd.read_csv(HISTORY_PATH)
+    shared_fleet = SharedFleet.publish(shared_dir, equipment_df, history_df, MODEL_PATH,
+                                       sources=[EQUIPMENT_PATH, HISTORY_PATH])
+    logger.info(f"Shared fleet state published to {shared_dir} ({len(shared_fleet.features)} equipment)")
+    return shared_fleet
+
+def shared_policy_attached():
+    """Whether preloaded shared weights serve inference in this process"""
+    return shared_fleet is not None and shared_fleet.policy_net is not None
+
+def score_current_fleet(equipment_df, current_issues, current_date, skip_errors=False):
+    """Score the fleet from shared preloaded features when they are current,
+    otherwise from the maintenance history on disk"""
+    from utils.fleet_scoring import score_fleet, score_fleet_features
+    
+    if shared_policy_attached() and shared_fleet.is_current(equipment_df):
+        start = time.perf_counter()
+        predictor = shared_fleet
+        if SHADOW_MODEL_PATHS:
+            # Shared weights stay the primary; shadows are stacked next to them
+            from models.policy_ensemble import PolicyEnsemble
+            predictor = PolicyEnsemble([shared_fleet] + get_shadow_policies(), names=MODEL_PATHS)
+        scored = score_fleet_features(shared_fleet.features, predictor, current_issues, current_date)
+        return scored, [{'shard': 'shared', 'equipment': len(equipment_df),
+                         'total_seconds': time.perf_counter() - start, 'pid': os.getpid()}]
+    
+    try:
+        history_df = read_csv_cached(HISTORY_PATH)
+        logger.debug(f"History data loaded, shape: {history_df.shape}")
+    except Exception as e:
+        logger.error(f"Error loading history data: {str(e)}")
+        raise
+    
+    return score_fleet(equipment_df, history_df, current_issues,
+                       model_path=MODEL_PATHS if SHADOW_MODEL_PATHS else MODEL_PATH,
+                       shard_key=SHARD_KEY, current_date=current_date,
+                       max_workers=SHARD_WORKERS, skip_errors=skip_errors, agent=get_agent())
+
+def log_shard_timings(timings):
+    for timing in timings:
+        logger.debug(f"Shard {timing['shard']}: {timing['equipment']} equipment scored in "
+                     f"{timing['total_seconds']:.3f}s (pid {timing['pid']})")
+
+def warm_data():
+    for path in (EQUIPMENT_PATH, HISTORY_PATH):
+        if os.path.exists(path):
+            read_csv_cached(path)
+
+def warm_model():
+    """Load the policy; with preloaded shared weights only the shadow policies are private"""
+    if not shared_policy_attached():
+        get_agent()
+    elif SHADOW_MODEL_PATHS:
+        get_shadow_policies()
+
+def warm_inference():
+    """Run one dummy scoring pass so the first request hits warm code paths"""
+    import numpy as np
+    import pandas as pd
+    
+    if os.path.exists(EQUIPMENT_PATH) and os.path.exists(HISTORY_PATH):
+        equipment_df = read_csv_cached(EQUIPMENT_PATH)
+        no_issues = pd.DataFrame(columns=['equipment_id', 'notification_type', 'priority'])
+        if not shared_policy_attached():
+            # One row is enough for the regular path; the shared path needs
+            # the whole fleet to match the published features
+            equipment_df = equipment_df.head(1)
+        score_current_fleet(equipment_df, no_issues, datetime.now())
+    elif shared_policy_attached():
+        shared_fleet.predict_maintenance(np.zeros((1, 8), dtype=np.float32))
+    else:
+        get_agent().predict_maintenance(np.zeros((1, 8), dtype=np.float32))
+
+# Startup sequence, run in a background thread once per process
+warmup = Warmup([
+    ('imports', import_heavy_modules),
+    ('model', warm_model),
+    ('data', warm_data),
+    ('inference', warm_inference),
+])
+
+@app.before_request
+def ensure_warmup():
+    # Fallback for servers that do not call warmup.start() themselves
+    warmup.start()
+
 # Serve UI5 static files
 @app.route('/')
 def serve_ui():
@@ -77,71 +279,28 @@ def serve_static(path):
 
 @app.route('/api/generate_schedule', methods=['POST'])
 def generate_schedule():
+    import pandas as pd
+    from utils.schedule_rules import build_schedule
+    
     try:
-        # Get equipment data
-        equipment_df = pd.read_csv('data/sample_data/equipment_master.csv', index_col='equipment_id')
-        history_df = pd.read_csv('data/sample_data/maintenance_history.csv')
-        current_issues = pd.read_csv('data/uploads/current_issues.csv')
+        # Issues of the given upload, by default the most recent one
+        result_id = request.args.get('result_id') or schedule_store.latest_result_id()
+        if not result_id or not schedule_store.has_upload(result_id):
+            return jsonify({'error': 'No issues have been uploaded'}), 404
         
-        # Initialize environment and load agent
-        env = MaintenanceEnv(equipment_df, history_df)
-        agent = MaintenanceAgent(state_size=8, action_size=2)
-        agent.load('models/saved/maintenance_dqn_best.pth')
+        # Get equipment data; the env needs the equipment_id column, so no index_col
+        equipment_df = read_csv_cached(EQUIPMENT_PATH)
+        current_issues = pd.read_csv(schedule_store.upload_path(result_id))
         
-        schedule = []
         current_date = datetime.now()
         
-        for _, equipment in env.equipment_df.iterrows():
-            # Get equipment state
-            env.current_equipment = equipment
-            env.current_date = current_date
-            state = env._get_state()
-            
-            # Get maintenance decision and probability
-            actions, probs = agent.predict_maintenance(state.reshape(1, -1))
-            maintenance_needed = actions[0] == 1
-            confidence = probs[0][1]  # Probability of maintenance action
-            
-            if maintenance_needed:
-                # Get current issues for this equipment
-                equipment_issues = current_issues[current_issues['equipment_id'] == equipment.name]
-                highest_priority = int(equipment_issues['priority'].min()) if not equipment_issues.empty else 4
-                
-                # Determine maintenance type based on issue type and priority
-                issue_types = equipment_issues['notification_type'].unique() if not equipment_issues.empty else []
-                if 'HYDR' in issue_types or highest_priority == 1:
-                    maint_type = 'PM03'  # Emergency maintenance for hydraulic issues or priority 1
-                elif 'MECH' in issue_types or 'ELEC' in issue_types or highest_priority == 2:
-                    maint_type = 'PM02'  # Corrective maintenance for mechanical/electrical issues or priority 2
-                else:
-                    maint_type = 'PM01'  # Preventive maintenance for other cases
-                
-                # Calculate days until maintenance based on priority
-                if highest_priority == 1:
-                    days_until_maintenance = 1  # Next day for critical issues
-                elif highest_priority == 2:
-                    days_until_maintenance = max(2, min(3, int(5 * (1 - confidence))))  # 2-3 days for high priority
-                elif highest_priority == 3:
-                    days_until_maintenance = max(7, min(14, int(14 * (1 - confidence))))  # 1-2 weeks for medium priority
-                else:
-                    days_until_maintenance = max(14, min(30, int(30 * (1 - confidence))))  # 2-4 weeks for low priority
-                
-                # Map priority to text
-                priority_map = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
-                priority = priority_map.get(highest_priority, 'Low')
-                
-                schedule.append({
-                    'equipment_id': equipment.name,
-                    'equipment_type': equipment['equipment_type'],
-                    'functional_location': equipment['functional_location'],
-                    'manufacturer': equipment['manufacturer'],
-                    'suggested_date': (current_date + timedelta(days=days_until_maintenance)).strftime('%Y-%m-%d'),
-                    'maintenance_type': maint_type,
-                    'priority': priority,
-                    'confidence': float(confidence),
-                    'breakdown_risk': float(state[5]),
-                    'estimated_duration': float(env._estimate_maintenance_cost() / 100)  # Rough estimate in hours
-                })
+        # Compute equipment states and maintenance decisions
+        scored, timings = score_current_fleet(equipment_df, current_issues, current_date)
+        log_shard_timings(timings)
+        record_shadow_disagreement(scored)
+        
+        # Aggregate issues once and apply the scheduling rules to all maintained equipment
+        schedule = build_schedule(scored, equipment_df, current_issues, current_date).to_dict('records')
         
         return jsonify(schedule)
         
@@ -150,128 +309,69 @@ def generate_schedule():
 
 @app.route('/api/upload_issues', methods=['POST'])
 def upload_issues():
+    import pandas as pd
+    from utils.schedule_rules import build_schedule
+    
     try:
         logger.debug("Starting upload_issues process")
-        # Save uploaded file
+        # The response carries the first page in the order and filters the client will page with
+        try:
+            query = parse_schedule_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Read the uploaded file; it is stored under its result id once the schedule is saved
         file = request.files['file']
         if not file:
             logger.error("No file uploaded")
             return jsonify({'error': 'No file uploaded'}), 400
-            
-        uploads_dir = os.path.join('data', 'uploads')
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir)
-            
-        file_path = os.path.join(uploads_dir, 'current_issues.csv')
-        file.save(file_path)
-        logger.debug(f"File saved to {file_path}")
+        payload = file.read()
         
         # Load data
         logger.debug("Loading data files")
         try:
             # Load equipment data without setting index
-            equipment_df = pd.read_csv('data/sample_data/equipment_master.csv')
+            equipment_df = read_csv_cached(EQUIPMENT_PATH)
             logger.debug(f"Equipment data loaded, shape: {equipment_df.shape}")
         except Exception as e:
             logger.error(f"Error loading equipment data: {str(e)}")
             raise
             
         try:
-            history_df = pd.read_csv('data/sample_data/maintenance_history.csv')
-            logger.debug(f"History data loaded, shape: {history_df.shape}")
-        except Exception as e:
-            logger.error(f"Error loading history data: {str(e)}")
-            raise
-            
-        try:
-            current_issues = pd.read_csv(file_path)
+            current_issues = pd.read_csv(io.BytesIO(payload))
             logger.debug(f"Current issues loaded, shape: {current_issues.shape}")
             logger.debug(f"Current issues columns: {current_issues.columns.tolist()}")
         except Exception as e:
             logger.error(f"Error loading current issues: {str(e)}")
             raise
         
-        # Initialize environment and load agent
-        logger.debug("Initializing environment and loading agent")
-        env = MaintenanceEnv(equipment_df, history_df, current_issues)
-        agent = MaintenanceAgent(state_size=8, action_size=2)
-        agent.load('models/saved/maintenance_dqn_best.pth')
-        
-        schedule = []
         current_date = datetime.now()
         logger.debug(f"Processing equipment states at {current_date}")
         
-        # Iterate through equipment using equipment_id column
-        for _, equipment in equipment_df.iterrows():
-            try:
-                eq_id = equipment['equipment_id']
-                logger.debug(f"Processing equipment {eq_id}")
-                
-                # Get equipment state
-                env.current_equipment = equipment
-                env.current_date = current_date
-                state = env._get_state()
-                
-                # Get maintenance decision and probability
-                actions, probs = agent.predict_maintenance(state.reshape(1, -1))
-                maintenance_needed = actions[0] == 1
-                confidence = probs[0][1]
-                breakdown_risk = float(state[5])
-                
-                logger.debug(f"Equipment {eq_id} - maintenance needed: {maintenance_needed}, confidence: {confidence:.2f}, risk: {breakdown_risk:.2f}")
-                
-                if maintenance_needed:
-                    # Get current issues for this equipment
-                    equipment_issues = current_issues[current_issues['equipment_id'] == eq_id]
-                    highest_priority = int(equipment_issues['priority'].min()) if not equipment_issues.empty else 4
-                    
-                    # Determine maintenance type based on priority and issue type
-                    issue_types = equipment_issues['notification_type'].unique() if not equipment_issues.empty else []
-                    logger.debug(f"Equipment {eq_id} - priority: {highest_priority}, issue types: {issue_types}")
-                    
-                    # Priority 1 issues or hydraulic issues get emergency maintenance
-                    if highest_priority == 1 or 'HYDR' in issue_types:
-                        maint_type = 'PM03' 
-                        days_until_maintenance = 1
-                    # Priority 2 issues or mechanical/electrical issues get corrective maintenance
-                    elif highest_priority == 2 or any(t in issue_types for t in ['MECH', 'ELEC']):
-                        maint_type = 'PM02'
-                        days_until_maintenance = max(2, min(3, int(5 * (1 - confidence))))
-                    # Lower priority issues get preventive maintenance
-                    else:
-                        maint_type = 'PM01'
-                        days_until_maintenance = max(7, min(14, int(14 * (1 - confidence)))) if highest_priority == 3 else max(14, min(30, int(30 * (1 - confidence))))
-                    
-                    logger.debug(f"Equipment {eq_id} - maintenance type: {maint_type}, days until maintenance: {days_until_maintenance}")
-                    
-                    schedule.append({
-                        'equipment_id': eq_id,
-                        'equipment_type': equipment['equipment_type'],
-                        'functional_location': equipment['functional_location'],
-                        'manufacturer': equipment['manufacturer'],
-                        'suggested_date': (current_date + pd.Timedelta(days=days_until_maintenance)).strftime('%Y-%m-%d'),
-                        'maintenance_type': maint_type,
-                        'priority': 'Critical' if highest_priority == 1 else 'High' if highest_priority == 2 else 'Medium' if highest_priority == 3 else 'Low',
-                        'confidence': float(confidence),
-                        'breakdown_risk': breakdown_risk,
-                        'estimated_duration': max(4, float(env._estimate_maintenance_cost() / 1000))
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Error processing equipment {eq_id}: {str(e)}")
-                continue
+        # Compute equipment states and maintenance decisions
+        scored, timings = score_current_fleet(equipment_df, current_issues, current_date, skip_errors=True)
+        log_shard_timings(timings)
+        record_shadow_disagreement(scored)
+        
+        # Emergency and corrective work is due within days, whatever the issue priority
+        schedule = build_schedule(scored, equipment_df, current_issues, current_date,
+                                  days_by='maintenance_type', duration_divisor=1000,
+                                  min_duration=4).to_dict('records')
+        logger.debug(f"{len(schedule)} of {len(scored)} scored equipment need maintenance")
         
         if not schedule:
             logger.error("No maintenance schedule could be generated")
             return jsonify({'error': 'No maintenance schedule could be generated'}), 400
             
-        # Save the generated schedule
-        schedule_df = pd.DataFrame(schedule)
-        schedule_path = os.path.join('data', 'maintenance_schedule.xlsx')
-        schedule_df.to_excel(schedule_path, index=False)
-        logger.debug(f"Schedule saved to {schedule_path}")
+        # Save the generated schedule; exports are rendered on download
+        result_id = schedule_store.save(schedule, upload=payload)
+        logger.debug(f"Schedule saved as result {result_id}")
         
-        return jsonify(schedule)
+        # Only the first page goes back; the rest is fetched from /api/schedule
+        results, count = get_schedule_index(result_id, schedule).query(**query)
+        response = jsonify({'result_id': result_id, 'count': count, 'results': results})
+        response.headers['X-Schedule-Id'] = result_id
+        return response
         
     except Exception as e:
         logger.error(f"Error in upload_issues: {str(e)}")
@@ -295,21 +395,72 @@ def download_template():
 @app.route('/api/download_schedule', methods=['GET'])
 def download_schedule():
     try:
-        schedule_path = os.path.join('data', 'maintenance_schedule.xlsx')
+        fmt = negotiate_format(request.args.get('format'), request.headers.get('Accept'))
+        if fmt is None:
+            return jsonify({'error': f"Unsupported format, expected one of: {', '.join(EXPORT_FORMATS)}"}), 406
+        
+        result_id = request.args.get('result_id') or schedule_store.latest_result_id()
+        if not result_id or not schedule_store.exists(result_id):
+            return jsonify({'error': 'No schedule has been generated'}), 404
+        
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        export_path = schedule_store.export(result_id, fmt)
         return send_file(
-            schedule_path,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            export_path,
+            mimetype=mimetype,
             as_attachment=True,
-            download_name='maintenance_schedule.xlsx'
+            download_name=f'maintenance_schedule.{extension}'
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/schedule', methods=['GET'])
+def get_schedule():
+    try:
+        try:
+            query = parse_schedule_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result_id = request.args.get('result_id') or schedule_store.latest_result_id()
+        if not result_id or not schedule_store.exists(result_id):
+            return jsonify({'error': 'No schedule has been generated'}), 404
+        
+        results, count = get_schedule_index(result_id).query(**query)
+        response = jsonify({'result_id': result_id, 'count': count, 'results': results})
+        response.headers['X-Schedule-Id'] = result_id
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/shadow')
+def shadow_report():
+    with _shadow_stats_lock:
+        models = {name: dict(totals) for name, totals in _shadow_stats.items()}
+    for totals in models.values():
+        totals['agreement'] = 1 - totals['disagreements'] / totals['equipment'] if totals['equipment'] else None
+    return jsonify({'primary': MODEL_PATH, 'shadows': SHADOW_MODEL_PATHS, 'models': models})
+
 @app.route('/api/health')
 def health_check():
-    return jsonify({"status": "healthy", "environment": os.environ.get('FLASK_ENV', 'development')})
+    if warmup.failed:
+        status = "unhealthy"
+    elif warmup.ready:
+        status = "healthy"
+    else:
+        status = "starting"
+    response = {"status": status, "environment": os.environ.get('FLASK_ENV', 'development'), "ready": warmup.ready}
+    return jsonify(response), 503 if warmup.failed else 200
+
+@app.route('/api/ready')
+def readiness_check():
+    return jsonify(warmup.report()), 200 if warmup.ready else 503
+
+if PRELOAD:
+    preload_shared_fleet()
 
 if __name__ == '__main__':
     if os.environ.get('FLASK_ENV') == 'production':
         init_db()
+    warmup.start()
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
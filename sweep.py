@@ -0,0 +1,204 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import torch
+
+from models.dqn_agent import MaintenanceAgent
+from models.feature_env import FeatureMaintenanceEnv
+from train import run_training_episode
+from utils.data_generator import cached_dataset
+from utils.shared_state import publish_arrays, attach_arrays
+
+# Hyperparameters accepted by MaintenanceAgent and how to parse them
+SWEEP_PARAMS = {
+    'learning_rate': float,
+    'gamma': float,
+    'epsilon_decay': float,
+    'memory_size': int,
+    'batch_size': int,
+    'target_update': int,
+}
+
+DEFAULT_GRID = {
+    'learning_rate': [0.001, 0.0005],
+    'gamma': [0.9, 0.95],
+    'epsilon_decay': [0.995, 0.999],
+}
+
+
+def parse_grid(param_args):
+    """Parse ['learning_rate=0.001,0.0005', ...] into a grid dict"""
+    if not param_args:
+        return dict(DEFAULT_GRID)
+
+    grid = {}
+    for arg in param_args:
+        name, _, values = arg.partition('=')
+        if name not in SWEEP_PARAMS or not values:
+            raise ValueError(f"Expected NAME=V1,V2,... with NAME one of {', '.join(SWEEP_PARAMS)}, got '{arg}'")
+        grid[name] = [SWEEP_PARAMS[name](value) for value in values.split(',')]
+    return grid
+
+
+def expand_grid(grid):
+    """All combinations of a grid as a list of parameter dicts"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def load_dataset(data_dir=None, num_machines=100, seed=0):
+    """Load equipment, history and issues from CSVs, or generate them in memory"""
+    if data_dir:
+        return (
+            pd.read_csv(os.path.join(data_dir, 'equipment_master.csv')),
+            pd.read_csv(os.path.join(data_dir, 'maintenance_history.csv')),
+            pd.read_csv(os.path.join(data_dir, 'current_issues.csv'))
+        )
+
+    return cached_dataset(num_machines=num_machines, seed=seed)
+
+
+def should_stop(reports, trial_id, episode, rolling_reward, min_peers):
+    """Median stopping rule: stop a trial whose rolling reward is below the
+    median of what other trials reported at the same episode"""
+    reports[(episode, trial_id)] = rolling_reward
+    peers = [reward for (peer_episode, peer_id), reward in reports.items()
+             if peer_episode == episode and peer_id != trial_id]
+    return len(peers) >= min_peers and rolling_reward < np.median(peers)
+
+
+def run_trial(trial_id, params, data_dir, num_episodes, window, grace_episodes,
+              report_every, min_peers, reports, seed):
+    """Train one configuration on the shared, memory-mapped dataset"""
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    start = time.perf_counter()
+    env = FeatureMaintenanceEnv.from_arrays(
+        attach_arrays(data_dir, FeatureMaintenanceEnv.array_names()), seed=seed
+    )
+    agent = MaintenanceAgent(
+        state_size=env.observation_space.shape[0],
+        action_size=env.action_space.n,
+        **params
+    )
+
+    rewards = deque(maxlen=window)
+    losses = []
+    best_rolling = float('-inf')
+    stopped_early = False
+    episodes_run = 0
+
+    for episode in range(1, num_episodes + 1):
+        total_reward, loss = run_training_episode(agent, env)
+        rewards.append(total_reward)
+        losses.append(loss if loss else 0)
+        episodes_run = episode
+
+        rolling_reward = float(np.mean(rewards))
+        if len(rewards) == window:
+            best_rolling = max(best_rolling, rolling_reward)
+
+        if episode >= grace_episodes and episode % report_every == 0 and episode < num_episodes:
+            if should_stop(reports, trial_id, episode, rolling_reward, min_peers):
+                stopped_early = True
+                break
+
+    return {
+        'trial': trial_id,
+        **params,
+        'episodes': episodes_run,
+        'stopped_early': stopped_early,
+        'rolling_reward': float(np.mean(rewards)),
+        'best_rolling_reward': best_rolling if best_rolling > float('-inf') else float(np.mean(rewards)),
+        'mean_loss': float(np.mean(losses[-window:])),
+        'final_epsilon': agent.epsilon,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_sweep(grid, num_episodes=300, max_workers=None, data_dir=None, num_machines=100,
+              seed=0, window=50, grace_episodes=100, report_every=25, min_peers=2,
+              output='data/sweep_results.csv'):
+    """Run every configuration in the grid in a process pool and write a results table"""
+    configs = expand_grid(grid)
+    equipment_df, history_df, issues_df = load_dataset(data_dir, num_machines, seed)
+
+    # Build the env arrays once and share them with all trials via memory-mapped files
+    shared_dir = tempfile.mkdtemp(prefix='maintenance-sweep-')
+    try:
+        env = FeatureMaintenanceEnv.from_frames(equipment_df, history_df, issues_df)
+        publish_arrays(env.to_arrays(), shared_dir)
+        print(f"Dataset: {len(equipment_df)} equipment, {len(history_df)} work orders, "
+              f"{len(issues_df)} issues; {len(configs)} configurations")
+
+        with multiprocessing.Manager() as manager:
+            reports = manager.dict()
+            with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+                futures = [
+                    pool.submit(run_trial, trial_id, params, shared_dir, num_episodes, window,
+                                grace_episodes, report_every, min_peers, reports, seed + trial_id)
+                    for trial_id, params in enumerate(configs)
+                ]
+                results = []
+                for future in futures:
+                    result = future.result()
+                    results.append(result)
+                    status = 'stopped early' if result['stopped_early'] else 'completed'
+                    print(f"Trial {result['trial']} {status} after {result['episodes']} episodes, "
+                          f"rolling reward {result['rolling_reward']:.2f}")
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+    results_df = pd.DataFrame(results).sort_values(
+        ['stopped_early', 'rolling_reward'], ascending=[True, False]
+    ).reset_index(drop=True)
+    if output:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        results_df.to_csv(output, index=False)
+    return results_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep for MaintenanceAgent')
+    parser.add_argument('--param', action='append', metavar='NAME=V1,V2',
+                        help=f"Values to sweep, NAME one of {', '.join(SWEEP_PARAMS)} (repeatable)")
+    parser.add_argument('--episodes', type=int, default=300, help='Episodes per configuration')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel trainings (default: cores)')
+    parser.add_argument('--data-dir', default=None,
+                        help='Load equipment_master/maintenance_history/current_issues CSVs from here '
+                             'instead of generating a dataset')
+    parser.add_argument('--num-machines', type=int, default=100, help='Size of a generated fleet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--window', type=int, default=50, help='Episodes in the rolling reward')
+    parser.add_argument('--grace-episodes', type=int, default=100, help='Episodes before early stopping applies')
+    parser.add_argument('--report-every', type=int, default=25, help='Episodes between early stopping checks')
+    parser.add_argument('--output', default='data/sweep_results.csv')
+    args = parser.parse_args()
+
+    results = run_sweep(
+        parse_grid(args.param),
+        num_episodes=args.episodes,
+        max_workers=args.workers,
+        data_dir=args.data_dir,
+        num_machines=args.num_machines,
+        seed=args.seed,
+        window=args.window,
+        grace_episodes=args.grace_episodes,
+        report_every=args.report_every,
+        output=args.output
+    )
+    print(results.to_string(index=False))
+    print(f"\nSweep results saved to '{args.output}'")
@@ -0,0 +1,74 @@
+import pickle
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from utils import data_generator
+from utils.data_generator import MaintenanceDataGenerator, cached_dataset
+
+REFERENCE_DATE = date(2026, 3, 14)
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    """Empty in-memory cache, and a list that records every generation"""
+    monkeypatch.setattr(data_generator, '_dataset_cache', {})
+    calls = []
+    generate = MaintenanceDataGenerator.generate_all_data
+
+    def counting(self, *args, **kwargs):
+        calls.append(self)
+        return generate(self, *args, **kwargs)
+
+    monkeypatch.setattr(MaintenanceDataGenerator, 'generate_all_data', counting)
+    return calls
+
+
+def assert_frames_equal(left, right):
+    assert len(left) == len(right) == 3
+    for left_frame, right_frame in zip(left, right):
+        pd.testing.assert_frame_equal(left_frame, right_frame)
+
+
+def test_key_misses_when_any_part_changes(tmp_path, monkeypatch, generations):
+    base = {'num_machines': 5, 'seed': 1, 'cache_dir': str(tmp_path), 'reference_date': REFERENCE_DATE}
+    frames = cached_dataset(**base)
+    assert len(generations) == 1
+
+    # Hit in memory, then on disk
+    assert_frames_equal(cached_dataset(**base), frames)
+    monkeypatch.setattr(data_generator, '_dataset_cache', {})
+    assert_frames_equal(cached_dataset(**base), frames)
+    assert len(generations) == 1
+
+    for change in [{'seed': 2}, {'num_machines': 6}, {'reference_date': date(2026, 3, 15)}]:
+        cached_dataset(**{**base, **change})
+    assert len(generations) == 4
+
+    monkeypatch.setattr(data_generator, 'GENERATOR_VERSION', data_generator.GENERATOR_VERSION + 1)
+    monkeypatch.setattr(data_generator, '_dataset_cache', {})
+    cached_dataset(**base)
+    assert len(generations) == 5
+
+
+@pytest.mark.parametrize('content', [
+    b'not a pickle',
+    b'',
+    'truncated',
+    pickle.dumps({'equipment': None}),
+    b'cno_such_module\nFrames\n(tR.',  # References a class that cannot be imported
+])
+def test_unreadable_cache_is_regenerated(tmp_path, monkeypatch, generations, content):
+    kwargs = {'num_machines': 5, 'seed': 1, 'cache_dir': str(tmp_path), 'reference_date': REFERENCE_DATE}
+    expected = cached_dataset(**kwargs)
+    (path,) = tmp_path.glob('dataset_*.pkl')
+    if content == 'truncated':
+        content = path.read_bytes()[:path.stat().st_size // 2]
+    path.write_bytes(content)
+
+    monkeypatch.setattr(data_generator, '_dataset_cache', {})
+    assert_frames_equal(cached_dataset(**kwargs), expected)
+    assert len(generations) == 2
+    # The regenerated frames replaced the bad file
+    assert_frames_equal(pd.read_pickle(path), expected)
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.fleet_features import FleetFeatures
+from models.maintenance_env import MaintenanceEnv, STATE_FEATURES
+from utils.data_generator import cached_dataset
+
+CURRENT_DATE = datetime(2026, 3, 14)
+
+
+@pytest.fixture
+def frames():
+    return cached_dataset(num_machines=30, seed=5, cache_dir=None, reference_date=date(2026, 3, 14))
+
+
+def env_state(env, equipment):
+    env.current_date = CURRENT_DATE
+    env.current_equipment = equipment
+    return dict(zip(STATE_FEATURES, env._get_state()))
+
+
+def test_env_joins_history_and_issues_by_equipment_id(frames):
+    equipment_df, history_df, issues_df = frames
+    assert isinstance(equipment_df.index, pd.RangeIndex)
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+
+    equipment = equipment_df.set_index('equipment_id', drop=False).loc[issues_df['equipment_id'].iloc[0]]
+    equipment_id = equipment['equipment_id']
+    state = env_state(env, equipment)
+
+    last_end = pd.to_datetime(history_df.loc[history_df['equipment_id'] == equipment_id, 'end_date']).max()
+    assert state['days_since_maintenance'] == pytest.approx((CURRENT_DATE - last_end).days / 365)
+    top_priority = issues_df.loc[issues_df['equipment_id'] == equipment_id, 'priority'].astype(int).min()
+    assert state['issue_priority'] == pytest.approx(1.25 - 0.25 * top_priority)
+
+
+@pytest.mark.parametrize('layout', ['range_index', 'id_index_with_column', 'id_index_only'])
+def test_states_do_not_depend_on_frame_layout(frames, layout):
+    equipment_df, history_df, issues_df = frames
+    expected = FleetFeatures.from_frames(equipment_df, history_df).states(issues_df, CURRENT_DATE)
+
+    if layout == 'id_index_with_column':
+        equipment_df = equipment_df.set_index('equipment_id', drop=False)
+    elif layout == 'id_index_only':
+        equipment_df = equipment_df.set_index('equipment_id')
+    features = FleetFeatures.from_frames(equipment_df, history_df)
+    np.testing.assert_array_equal(features.states(issues_df, CURRENT_DATE), expected)
+    assert list(features.labels) == list(equipment_df.index)
+
+    if 'equipment_id' not in equipment_df.columns:
+        return  # The env samples episodes by the equipment_id column, so it needs one
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+    env_states = [list(env_state(env, equipment).values()) for _, equipment in equipment_df.iterrows()]
+    np.testing.assert_allclose(np.array(env_states, dtype=np.float32), expected, rtol=1e-6)
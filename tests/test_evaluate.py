@@ -0,0 +1,44 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from evaluate import evaluate_checkpoint, one_step_starts
+from models.dqn_agent import MaintenanceAgent
+from models.feature_env import FeatureMaintenanceEnv
+from utils.data_generator import cached_dataset
+
+
+@pytest.fixture
+def env():
+    frames = cached_dataset(num_machines=60, seed=2, cache_dir=None, reference_date=date(2026, 3, 14))
+    return FeatureMaintenanceEnv.from_frames(*frames, seed=0)
+
+
+@pytest.fixture
+def checkpoint(tmp_path, env):
+    path = str(tmp_path / 'agent.pth')
+    MaintenanceAgent(state_size=env.observation_space.shape[0], action_size=env.action_space.n).save(path)
+    return path
+
+
+def test_one_step_episodes_are_counted(env, checkpoint):
+    start_rows = env.sample_start_rows(500)
+    start_date = datetime(2026, 3, 14)
+
+    result = evaluate_checkpoint(checkpoint, env, start_rows, start_date)
+    _, steps, _ = env.rollout(lambda states: np.zeros(len(states), dtype=np.int64), start_rows, start_date)
+    assert result['one_step_episodes'] == one_step_starts(env, start_rows, start_date).sum() == (steps == 1).sum()
+    assert 0 < result['one_step_episodes'] < len(start_rows)
+
+
+def test_stale_history_warns_instead_of_failing(env, checkpoint):
+    # Years after the last work order every machine is past its maintenance cycle
+    start_date = datetime(2030, 1, 1)
+    start_rows = env.sample_start_rows(200)
+    assert one_step_starts(env, start_rows, start_date).all()
+
+    with pytest.warns(UserWarning, match='ended after one step'):
+        result = evaluate_checkpoint(checkpoint, env, start_rows, start_date)
+    assert result['one_step_episodes'] == 200
+    assert result['mean_episode_length'] == 1
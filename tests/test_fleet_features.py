@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from models.fleet_features import FleetFeatures
+from models.maintenance_env import MaintenanceEnv
+from utils.data_generator import cached_dataset
+
+
+@pytest.fixture
+def frames():
+    """Generated fleet where some equipment has no history, no issues, or neither"""
+    equipment_df, history_df, issues_df = cached_dataset(num_machines=50, seed=7, cache_dir=None,
+                                                         reference_date=date(2026, 3, 14))
+    ids = equipment_df['equipment_id'].values
+    history_df = history_df[~history_df['equipment_id'].isin(ids[:12])].reset_index(drop=True)
+    issues_df = issues_df[~issues_df['equipment_id'].isin(ids[6:18])].reset_index(drop=True)
+    return equipment_df, history_df, issues_df
+
+
+def env_rows(env, current_date):
+    """State and estimated cost of every equipment row, computed one row at a time by the env"""
+    env.current_date = current_date
+    states, costs = [], []
+    for _, equipment in env.equipment_df.iterrows():
+        env.current_equipment = equipment
+        states.append(env._get_state())
+        costs.append(env._estimate_maintenance_cost())
+    return np.array(states), np.array(costs)
+
+
+@pytest.mark.parametrize('current_date', [datetime(2026, 3, 14), datetime(2026, 7, 2, 15, 45)])
+def test_states_match_env(frames, current_date):
+    equipment_df, history_df, issues_df = frames
+    has_history = equipment_df['equipment_id'].isin(history_df['equipment_id']).values
+    has_issues = equipment_df['equipment_id'].isin(issues_df['equipment_id']).values
+    assert (~has_history & ~has_issues).any() and (~has_history & has_issues).any()
+    assert (has_history & ~has_issues).any() and (has_history & has_issues).any()
+
+    features = FleetFeatures.from_frames(equipment_df, history_df)
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+    env_states, env_costs = env_rows(env, current_date)
+
+    np.testing.assert_allclose(features.states(issues_df, current_date), env_states, rtol=1e-6)
+    np.testing.assert_allclose(features.estimated_costs(), env_costs, rtol=1e-9)
@@ -0,0 +1,30 @@
+import pickle
+
+import pytest
+
+from models.dqn_agent import MaintenanceAgent
+from models.maintenance_env import STATE_FEATURES
+from models.policy_ensemble import PolicyEnsemble
+from utils.fleet_scoring import load_policy
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    path = str(tmp_path / 'primary.pth')
+    MaintenanceAgent(state_size=len(STATE_FEATURES), action_size=2).save(path)
+    return path
+
+
+def test_shadow_checkpoints_are_required(tmp_path, checkpoint):
+    missing = str(tmp_path / 'missing.pth')
+    with pytest.raises(FileNotFoundError, match='missing.pth'):
+        load_policy([checkpoint, missing])
+    with pytest.raises(FileNotFoundError, match='missing.pth'):
+        load_policy(missing, required=True)
+
+    corrupted = tmp_path / 'corrupted.pth'
+    corrupted.write_bytes(b'not a checkpoint')
+    with pytest.raises(pickle.UnpicklingError):
+        load_policy([checkpoint, str(corrupted)])
+
+    assert isinstance(load_policy([checkpoint, checkpoint]), PolicyEnsemble)
@@ -0,0 +1,180 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.maintenance_env import MaintenanceEnv, SAMPLING_MODES, STATE_FEATURES
+from utils.data_generator import cached_dataset
+
+CURRENT_DATE = datetime(2026, 3, 14)
+
+
+@pytest.fixture
+def frames():
+    return cached_dataset(num_machines=40, seed=3, cache_dir=None, reference_date=date(2026, 3, 14))
+
+
+def fleet_states(env, current_date=CURRENT_DATE):
+    """State of every equipment row, plus its estimated maintenance cost"""
+    env.current_date = current_date
+    states = []
+    for _, equipment in env.equipment_df.iterrows():
+        env.current_equipment = equipment
+        states.append(np.append(env._get_state(), env._estimate_maintenance_cost()))
+    return np.array(states)
+
+
+def assert_matches_rebuild(env):
+    """Incremental aggregates equal those of an env built from the current frames"""
+    rebuilt = MaintenanceEnv(env.equipment_df, env.history_df.copy(), env.current_issues_df.copy(),
+                             sampling=env.sampling, seed=0)
+
+    assert env._history_starts == rebuilt._history_starts
+    assert env._issue_priorities == rebuilt._issue_priorities
+    assert env._history_stats.keys() == rebuilt._history_stats.keys()
+    for equipment_id, stats in rebuilt._history_stats.items():
+        incremental = env._history_stats[equipment_id]
+        assert incremental['count'] == stats['count']
+        assert incremental['cost_count'] == stats['cost_count']
+        assert incremental['cost_sum'] == pytest.approx(stats['cost_sum'])
+        assert pd.Timestamp(incremental['last_end']) == pd.Timestamp(stats['last_end'])
+
+    np.testing.assert_allclose(fleet_states(env), fleet_states(rebuilt), rtol=1e-6)
+    np.testing.assert_array_equal(env.episode_weights(), rebuilt.episode_weights())
+
+
+def work_orders(equipment_ids, start, cost=1500.0):
+    return pd.DataFrame({
+        'equipment_id': equipment_ids,
+        'actual_cost': cost,
+        'start_date': start,
+        'end_date': start + timedelta(hours=6),
+    })
+
+
+def test_add_work_orders_matches_rebuild(frames):
+    equipment_df, history_df, issues_df = frames
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+    ids = equipment_df['equipment_id'].values
+
+    env.add_work_orders(work_orders(ids[:5], CURRENT_DATE - timedelta(days=2)))
+    # Second batch: one equipment again, a missing cost and an equipment without history
+    batch = work_orders([ids[0], ids[7], 'EQ-NEW-0001'], CURRENT_DATE - timedelta(days=1))
+    batch.loc[1, 'actual_cost'] = np.nan
+    env.add_work_orders(batch)
+
+    assert len(env.history_df) == len(history_df) + 8
+    assert_matches_rebuild(env)
+
+
+def test_issue_updates_match_rebuild(frames):
+    equipment_df, history_df, issues_df = frames
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+    ids = equipment_df['equipment_id'].values
+
+    closed = issues_df['notification_id'].iloc[0]
+    assert env.close_issue(closed)
+    assert not env.close_issue(closed)
+    assert not env.close_issue('NOTIF-UNKNOWN')
+
+    env.upsert_issues(pd.DataFrame({
+        # Replace an open issue, reopen the closed one and add a new one
+        'notification_id': [issues_df['notification_id'].iloc[1], closed, 'NOTIF-NEW-1'],
+        'equipment_id': [ids[10], ids[11], ids[12]],
+        'notification_type': ['HYDR', 'MECH', 'ELEC'],
+        'priority': ['1', '4', '2'],
+    }))
+
+    assert len(env.current_issues_df) == len(issues_df) + 1
+    assert_matches_rebuild(env)
+
+
+def test_interleaved_updates_match_rebuild(frames):
+    equipment_df, history_df, issues_df = frames
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, sampling='risk', seed=0)
+    ids = equipment_df['equipment_id'].values
+
+    for day in range(5):
+        env.add_work_orders(work_orders(ids[day::7], CURRENT_DATE - timedelta(days=day), cost=500.0 * day))
+        env.upsert_issues(pd.DataFrame({
+            'notification_id': [f'NOTIF-DAY-{day}'],
+            'equipment_id': [ids[day]],
+            'notification_type': ['PERF'],
+            'priority': [str(day % 4 + 1)],
+        }))
+        if day % 2:
+            env.close_issue(f'NOTIF-DAY-{day - 1}')
+        # Reading a frame mid-way rebuilds it; later updates must still apply
+        env.history_df
+        env.current_issues_df
+
+    assert_matches_rebuild(env)
+
+
+def test_issue_sampling_follows_updates_without_rebuilding(frames):
+    equipment_df, history_df, issues_df = frames
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, seed=0)
+    ids = equipment_df['equipment_id'].values
+
+    for notification_id in issues_df['notification_id']:
+        env.close_issue(notification_id)
+    env.upsert_issues(pd.DataFrame({
+        'notification_id': ['NOTIF-A', 'NOTIF-B', 'NOTIF-C'],
+        'equipment_id': [ids[3], ids[3], ids[8]],
+        'notification_type': ['MECH', 'ELEC', 'HYDR'],
+        'priority': ['2', '3', '1'],
+    }))
+
+    picked = []
+    for _ in range(300):
+        env.reset()
+        picked.append(env.current_equipment['equipment_id'])
+    assert set(picked) == {ids[3], ids[8]}
+    assert 150 < picked.count(ids[3]) < 250
+    assert env._issue_updates  # Sampling did not rebuild current_issues_df
+    np.testing.assert_array_equal(np.flatnonzero(env.episode_weights()), [3, 8])
+
+
+def test_issues_weights_follow_open_issue_counts(frames):
+    equipment_df, history_df, issues_df = frames
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, sampling='issues', seed=0)
+
+    counts = issues_df['equipment_id'].value_counts().reindex(equipment_df['equipment_id'], fill_value=0)
+    np.testing.assert_allclose(env.episode_weights(), counts.values / counts.sum())
+
+
+def test_risk_weights_follow_breakdown_risk():
+    # Risk is weighted as of now, so the history has to be recent
+    frames = cached_dataset(num_machines=40, seed=3, cache_dir=None, reference_date=date.today())
+    env = MaintenanceEnv(*frames, sampling='risk', seed=0)
+
+    weights = env.episode_weights()
+    risk = fleet_states(env, datetime.now())[:, STATE_FEATURES.index('breakdown_risk')]
+    assert len(np.unique(risk)) > 1 and (risk < 0).any()
+    risk = np.maximum(risk, 0)
+    np.testing.assert_allclose(weights, risk / risk.sum(), rtol=1e-5)
+
+
+def test_uniform_weights(frames):
+    env = MaintenanceEnv(*frames, sampling='uniform', seed=0)
+    np.testing.assert_array_equal(env.episode_weights(), np.full(len(frames[0]), 1 / len(frames[0])))
+
+
+def test_unknown_sampling_mode_is_rejected(frames):
+    with pytest.raises(ValueError, match=', '.join(SAMPLING_MODES)):
+        MaintenanceEnv(*frames, sampling='priority')
+
+
+@pytest.mark.parametrize('sampling', ['issues', 'risk'])
+def test_all_zero_weights_fall_back_to_uniform(frames, sampling):
+    equipment_df, history_df, issues_df = frames
+    # No open issues, and for risk: every machine new and maintained just now
+    now = pd.Timestamp.now()
+    equipment_df = equipment_df.assign(installation_date=now)
+    history_df = history_df.assign(end_date=now)
+    env = MaintenanceEnv(equipment_df, history_df, issues_df.iloc[:0], sampling=sampling, seed=0)
+
+    np.testing.assert_array_equal(env.episode_weights(), np.full(len(equipment_df), 1 / len(equipment_df)))
+    rows = {env._next_episode_row() for _ in range(2000)}
+    assert len(rows) == len(equipment_df)
@@ -0,0 +1,75 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from models.replay_buffer import MemmapReplayBuffer
+
+STATE_SIZE = 4
+
+
+def transition(i):
+    """Transition whose fields all encode i, so records can be checked after any read"""
+    state = np.full(STATE_SIZE, i, dtype=np.float32)
+    return state, i % 2, float(i), state + 1, i % 3 == 0
+
+
+def rewards(buffer):
+    return [reward for _, _, reward, _, _ in buffer]
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 4, 100])
+def test_wrap_around_keeps_oldest_to_newest_order(tmp_path, block_size):
+    buffer = MemmapReplayBuffer(str(tmp_path / 'replay'), capacity=7, state_size=STATE_SIZE)
+    expected = deque(maxlen=7)
+
+    for i in range(5):
+        buffer.append(transition(i))
+        expected.append(transition(i))
+    # Blocks that fit, cross the end of the file, or overfill the buffer
+    batch = [transition(i) for i in range(5, 25)]
+    buffer.extend(batch, block_size=block_size)
+    expected.extend(batch)
+
+    assert len(buffer) == 7
+    assert rewards(buffer) == rewards(expected)
+    for (state, action, reward, next_state, done), i in zip(buffer, range(18, 25)):
+        np.testing.assert_array_equal(state, transition(i)[0])
+        np.testing.assert_array_equal(next_state, transition(i)[3])
+        assert (action, reward, done) == transition(i)[1:3] + (transition(i)[4],)
+    assert [float(r) for block in buffer.blocks(block_size=2) for r in block['reward']] == rewards(expected)
+
+
+def test_reopen_after_flush_keeps_contents_and_capacity(tmp_path):
+    directory = str(tmp_path / 'replay')
+    buffer = MemmapReplayBuffer(directory, capacity=6, state_size=STATE_SIZE)
+    buffer.extend([transition(i) for i in range(9)])
+    buffer.flush()
+    del buffer
+
+    reopened = MemmapReplayBuffer(directory, capacity=100, state_size=STATE_SIZE)
+    assert reopened.capacity == 6
+    assert rewards(reopened) == [3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+
+    reopened.append(transition(10))
+    assert rewards(reopened) == [4.0, 5.0, 6.0, 7.0, 8.0, 10.0]
+
+    with pytest.raises(ValueError, match='different size'):
+        MemmapReplayBuffer(directory, state_size=STATE_SIZE + 1)
+
+
+def test_sample_after_wrap_returns_stored_transitions(tmp_path):
+    buffer = MemmapReplayBuffer(str(tmp_path / 'replay'), capacity=8, state_size=STATE_SIZE)
+    buffer.extend([transition(i) for i in range(21)])
+
+    states, actions, rewards_, next_states, dones = buffer.sample(8)
+    # A full-size batch holds every stored record exactly once
+    assert sorted(rewards_.tolist()) == [float(i) for i in range(13, 21)]
+    np.testing.assert_array_equal(states[:, 0], rewards_)
+    np.testing.assert_array_equal(next_states, states + 1)
+    np.testing.assert_array_equal(actions, rewards_.astype(np.int64) % 2)
+    np.testing.assert_array_equal(dones, rewards_.astype(np.int64) % 3 == 0)
+
+    _, _, sampled, _, _ = buffer.sample(3)
+    assert len(set(sampled.tolist())) == 3
+    assert set(sampled.tolist()) <= set(range(13, 21))
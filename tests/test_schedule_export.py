@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from utils.schedule_export import ScheduleStore, negotiate_format
+
+
+def save_schedules(store, count):
+    """Save count distinct schedules with exports, one second apart in mtime (oldest first)"""
+    result_ids = []
+    for i in range(count):
+        result_id = store.save([{'equipment_id': f'EQ-{i:04d}', 'priority': 'Low'}], upload=b'equipment_id\n')
+        store.export(result_id, 'csv')
+        mtime = time.time() - 100 + i
+        for path in (store._result_path(result_id), store.upload_path(result_id),
+                     os.path.join(store.exports_dir, f'{result_id}.csv')):
+            os.utime(path, (mtime, mtime))
+        result_ids.append(result_id)
+    return result_ids
+
+
+def stored_ids(store):
+    return {
+        directory: sorted(name.split('.', 1)[0] for name in os.listdir(directory))
+        for directory in (store.results_dir, store.exports_dir, store.uploads_dir)
+    }
+
+
+def test_evict_keeps_newest_results_with_their_files(tmp_path):
+    store = ScheduleStore(base_dir=str(tmp_path))
+    result_ids = save_schedules(store, 5)
+
+    store.max_results = 2
+    assert store.evict() == sorted(result_ids[:3])
+    stored = stored_ids(store)
+    assert stored[store.results_dir] == sorted(result_ids[3:] + ['latest'])
+    assert stored[store.exports_dir] == stored[store.uploads_dir] == sorted(result_ids[3:])
+
+
+def test_evict_always_keeps_latest(tmp_path):
+    store = ScheduleStore(base_dir=str(tmp_path), max_age=0)
+    result_ids = save_schedules(store, 3)
+    assert store.latest_result_id() == result_ids[-1]
+    assert store.exists(result_ids[-1]) and not store.exists(result_ids[0])
+
+    # Every result is over age, but the latest one is still served
+    assert store.evict() == []
+    assert store.exists(result_ids[-1])
+    assert store.load_records(result_ids[-1])[0]['equipment_id'] == 'EQ-0002'
+
+
+def test_evict_keeps_latest_written_by_another_worker(tmp_path):
+    store = ScheduleStore(base_dir=str(tmp_path))
+    older, newer = save_schedules(store, 2)
+    with open(store.latest_path, 'w') as f:
+        f.write(older)
+
+    store.max_results = 1
+    assert store.evict(keep=newer) == []
+    assert store.exists(older) and store.exists(newer)
+
+
+@pytest.mark.parametrize('requested, accept_header, expected', [
+    (None, None, 'xlsx'),
+    (None, '  ', 'xlsx'),
+    ('CSV', 'application/vnd.apache.parquet', 'csv'),
+    ('pdf', None, None),
+    (None, 'text/csv', 'csv'),
+    (None, '*/*;q=0.8', 'xlsx'),
+    (None, 'text/csv, */*;q=0.8', 'csv'),
+    (None, 'text/csv;q=0.5, */*;q=0.8', 'xlsx'),
+    (None, 'application/*', 'xlsx'),
+    (None, 'application/*;q=0.9, application/vnd.apache.parquet', 'parquet'),
+    (None, 'text/csv;q=0', None),
+    (None, 'text/csv;q=0, */*', 'xlsx'),
+    (None, 'text/csv;q=0, text/*', None),
+    # The more specific type's weight wins over the wildcard's
+    (None, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;q=0, text/csv;q=0.1, */*', 'parquet'),
+    (None, 'application/pdf', None),
+    (None, 'application/pdf, text/*;q=0.5', 'csv'),
+])
+def test_negotiate_format(requested, accept_header, expected):
+    assert negotiate_format(requested, accept_header) == expected
@@ -0,0 +1,88 @@
+import pytest
+
+from utils.schedule_query import MAX_PAGE_SIZE, ScheduleIndex, parse_schedule_query
+
+RECORDS = [
+    {'equipment_id': 'EQ-0', 'functional_location': 'PLANT-PP-FLC-00', 'maintenance_type': 'PM01',
+     'priority': 'Low', 'suggested_date': '2026-03-30', 'breakdown_risk': 0.2},
+    {'equipment_id': 'EQ-1', 'functional_location': 'PLANT-PP-FLC-01', 'maintenance_type': 'PM03',
+     'priority': 'Critical', 'suggested_date': '2026-03-15', 'breakdown_risk': 0.9},
+    {'equipment_id': 'EQ-2', 'functional_location': 'PLANT-PP-RTG-00', 'maintenance_type': 'PM02',
+     'priority': 'High', 'suggested_date': '2026-03-17', 'breakdown_risk': 0.7},
+    {'equipment_id': 'EQ-3', 'functional_location': 'PLANT-QC-00', 'maintenance_type': 'PM02',
+     'priority': 'Critical', 'suggested_date': '2026-03-15', 'breakdown_risk': 0.95},
+    {'equipment_id': 'EQ-4', 'functional_location': 'PLANT-PP-FLC-10', 'maintenance_type': 'PM01',
+     'priority': 'Medium', 'suggested_date': '2026-03-25', 'breakdown_risk': 0.4},
+    {'equipment_id': 'EQ-5', 'functional_location': None, 'maintenance_type': 'PM02',
+     'priority': 'High', 'suggested_date': '2026-03-16', 'breakdown_risk': 0.6},
+]
+
+
+def equipment(args):
+    rows, count = ScheduleIndex(RECORDS).query(**parse_schedule_query(args))
+    return [row['equipment_id'] for row in rows], count
+
+
+def test_defaults():
+    assert parse_schedule_query({}) == {'top': 50, 'skip': 0, 'orderby': None, 'descending': False, 'filters': {}}
+
+
+@pytest.mark.parametrize('args, top, skip', [
+    ({'$top': '0'}, 0, 0),
+    ({'$top': str(MAX_PAGE_SIZE + 1)}, MAX_PAGE_SIZE, 0),
+    ({'$top': '10', '$skip': '1000000'}, 10, 1000000),
+])
+def test_page_bounds(args, top, skip):
+    query = parse_schedule_query(args)
+    assert (query['top'], query['skip']) == (top, skip)
+
+
+@pytest.mark.parametrize('args', [{'$top': '-1'}, {'$skip': '-5'}, {'$top': 'ten'}, {'$skip': '1.5'}])
+def test_invalid_page_bounds(args):
+    with pytest.raises(ValueError, match=r'\$top and \$skip'):
+        parse_schedule_query(args)
+
+
+@pytest.mark.parametrize('orderby', ['equipment_id', 'priority up', 'priority desc extra', 'desc'])
+def test_invalid_orderby(orderby):
+    with pytest.raises(ValueError, match=r'\$orderby must be one of'):
+        parse_schedule_query({'$orderby': orderby})
+
+
+def test_paging():
+    assert equipment({'$top': '2', '$skip': '1'}) == (['EQ-1', 'EQ-2'], 6)
+    assert equipment({'$top': '0'}) == ([], 6)
+    assert equipment({'$skip': '6'}) == ([], 6)
+    assert equipment({'$top': '4', '$skip': '4'}) == (['EQ-4', 'EQ-5'], 6)
+
+
+def test_orderby():
+    # Ties keep schedule order, also when descending reverses the order
+    assert equipment({'$orderby': 'priority'})[0] == ['EQ-1', 'EQ-3', 'EQ-2', 'EQ-5', 'EQ-4', 'EQ-0']
+    assert equipment({'$orderby': 'suggested_date asc'})[0] == ['EQ-1', 'EQ-3', 'EQ-5', 'EQ-2', 'EQ-4', 'EQ-0']
+    assert equipment({'$orderby': 'breakdown_risk desc', '$top': '3'}) == (['EQ-3', 'EQ-1', 'EQ-2'], 6)
+
+
+@pytest.mark.parametrize('args, expected', [
+    ({'maintenance_type': 'PM02'}, ['EQ-2', 'EQ-3', 'EQ-5']),
+    ({'maintenance_type': 'PM02,PM03'}, ['EQ-1', 'EQ-2', 'EQ-3', 'EQ-5']),
+    ({'maintenance_type': 'pm02'}, []),
+    # Functional locations match by case-insensitive prefix
+    ({'functional_location': 'PLANT-PP-FLC-0'}, ['EQ-0', 'EQ-1']),
+    ({'functional_location': 'plant-pp-flc'}, ['EQ-0', 'EQ-1', 'EQ-4']),
+    ({'functional_location': 'PLANT-PP-FLC-01'}, ['EQ-1']),
+    ({'functional_location': 'PLANT-QC,PLANT-PP-RTG'}, ['EQ-2', 'EQ-3']),
+    ({'functional_location': 'PLANT-XX'}, []),
+    ({'functional_location': ' ,'}, []),
+    # Different columns must all match
+    ({'functional_location': 'PLANT-PP', 'maintenance_type': 'PM01,PM03'}, ['EQ-0', 'EQ-1', 'EQ-4']),
+    ({'functional_location': 'PLANT-PP', 'maintenance_type': 'PM02', '$orderby': 'breakdown_risk desc'}, ['EQ-2']),
+])
+def test_filters(args, expected):
+    assert equipment(args) == (expected, len(expected))
+
+
+def test_filter_count_is_before_paging():
+    assert equipment({'functional_location': 'PLANT', '$orderby': 'priority', '$top': '2', '$skip': '1'}) == (
+        ['EQ-3', 'EQ-2'], 5
+    )
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.schedule_rules import build_schedule
+
+CURRENT_DATE = datetime(2026, 3, 14, 9, 30)
+
+
+def make_fleet(num_machines=300, num_issues=400, seed=0):
+    """Equipment, scored fleet and issues covering every priority and issue type"""
+    rng = np.random.default_rng(seed)
+    equipment_df = pd.DataFrame({
+        'equipment_id': [f'EQ-{i:04d}' for i in range(num_machines)],
+        'equipment_type': rng.choice(['FLC', 'RTG', 'QC', 'RS', 'TT'], num_machines),
+        'functional_location': [f'PLANT-{i // 20:02d}' for i in range(num_machines)],
+        'manufacturer': rng.choice(['GE', 'Siemens', 'ABB'], num_machines),
+    })
+    scored = pd.DataFrame({
+        'action': rng.integers(0, 2, num_machines),
+        'confidence': rng.random(num_machines).astype(np.float32),
+        'breakdown_risk': rng.random(num_machines).astype(np.float32),
+        'estimated_cost': rng.uniform(500, 20000, num_machines),
+    }, index=equipment_df.index)
+    # Issues on about half the fleet, several per machine for some
+    issues_df = pd.DataFrame({
+        'equipment_id': rng.choice(equipment_df['equipment_id'].values[:num_machines // 2], num_issues),
+        'notification_type': rng.choice(['MECH', 'ELEC', 'HYDR', 'PERF'], num_issues),
+        'priority': rng.choice(['1', '2', '3', '4'], num_issues),
+    })
+    return equipment_df, scored, issues_df
+
+
+def loop_schedule(scored, equipment_df, issues_df, current_date):
+    """The per-row rules build_schedule replaced (train.py and generate_schedule)"""
+    schedule = []
+    for equipment_id, scores in scored.iterrows():
+        equipment = equipment_df.loc[equipment_id]
+        confidence = scores['confidence']
+        if scores['action'] != 1:
+            continue
+        equipment_issues = issues_df[issues_df['equipment_id'] == equipment_id]
+        highest_priority = int(equipment_issues['priority'].min()) if not equipment_issues.empty else 4
+        issue_types = equipment_issues['notification_type'].unique() if not equipment_issues.empty else []
+        if 'HYDR' in issue_types or highest_priority == 1:
+            maint_type = 'PM03'
+        elif 'MECH' in issue_types or 'ELEC' in issue_types or highest_priority == 2:
+            maint_type = 'PM02'
+        else:
+            maint_type = 'PM01'
+
+        if highest_priority == 1:
+            days_until_maintenance = 1
+        elif highest_priority == 2:
+            days_until_maintenance = max(2, min(3, int(5 * (1 - confidence))))
+        elif highest_priority == 3:
+            days_until_maintenance = max(7, min(14, int(14 * (1 - confidence))))
+        else:
+            days_until_maintenance = max(14, min(30, int(30 * (1 - confidence))))
+
+        schedule.append({
+            'equipment_id': equipment_id,
+            'equipment_type': equipment['equipment_type'],
+            'functional_location': equipment['functional_location'],
+            'manufacturer': equipment['manufacturer'],
+            'suggested_date': (current_date + timedelta(days=days_until_maintenance)).strftime('%Y-%m-%d'),
+            'maintenance_type': maint_type,
+            'priority': {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}.get(highest_priority, 'Low'),
+            'confidence': float(confidence),
+            'breakdown_risk': float(scores['breakdown_risk']),
+            'estimated_duration': float(scores['estimated_cost'] / 100)
+        })
+    return pd.DataFrame(schedule)
+
+
+def loop_upload_schedule(scored, equipment_df, issues_df, current_date):
+    """The per-row rules of the old upload_issues handler"""
+    schedule = []
+    for label, scores in scored.iterrows():
+        equipment = equipment_df.loc[label]
+        eq_id = equipment['equipment_id']
+        confidence = scores['confidence']
+        if scores['action'] != 1:
+            continue
+        equipment_issues = issues_df[issues_df['equipment_id'] == eq_id]
+        highest_priority = int(equipment_issues['priority'].min()) if not equipment_issues.empty else 4
+        issue_types = equipment_issues['notification_type'].unique() if not equipment_issues.empty else []
+        if highest_priority == 1 or 'HYDR' in issue_types:
+            maint_type = 'PM03'
+            days_until_maintenance = 1
+        elif highest_priority == 2 or any(t in issue_types for t in ['MECH', 'ELEC']):
+            maint_type = 'PM02'
+            days_until_maintenance = max(2, min(3, int(5 * (1 - confidence))))
+        else:
+            maint_type = 'PM01'
+            days_until_maintenance = (max(7, min(14, int(14 * (1 - confidence)))) if highest_priority == 3
+                                      else max(14, min(30, int(30 * (1 - confidence)))))
+
+        schedule.append({
+            'equipment_id': eq_id,
+            'equipment_type': equipment['equipment_type'],
+            'functional_location': equipment['functional_location'],
+            'manufacturer': equipment['manufacturer'],
+            'suggested_date': (current_date + pd.Timedelta(days=days_until_maintenance)).strftime('%Y-%m-%d'),
+            'maintenance_type': maint_type,
+            'priority': ('Critical' if highest_priority == 1 else 'High' if highest_priority == 2
+                         else 'Medium' if highest_priority == 3 else 'Low'),
+            'confidence': float(confidence),
+            'breakdown_risk': float(scores['breakdown_risk']),
+            'estimated_duration': max(4, float(scores['estimated_cost'] / 1000))
+        })
+    return pd.DataFrame(schedule)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_loop_with_equipment_id_index(seed):
+    equipment_df, scored, issues_df = make_fleet(seed=seed)
+    # generate_schedule used to read the equipment master with index_col='equipment_id'
+    equipment_df = equipment_df.set_index('equipment_id')
+    scored.index = equipment_df.index
+
+    expected = loop_schedule(scored, equipment_df, issues_df, CURRENT_DATE)
+    result = build_schedule(scored, equipment_df, issues_df, CURRENT_DATE)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_upload_loop(seed):
+    equipment_df, scored, issues_df = make_fleet(seed=seed)
+
+    expected = loop_upload_schedule(scored, equipment_df, issues_df, CURRENT_DATE)
+    result = build_schedule(scored, equipment_df, issues_df, CURRENT_DATE,
+                            days_by='maintenance_type', duration_divisor=1000, min_duration=4)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_equipment_id_column_joins_issues():
+    equipment_df, scored, issues_df = make_fleet()
+    scored['action'] = 1
+    issues_df = pd.DataFrame({'equipment_id': ['EQ-0003'], 'notification_type': ['HYDR'], 'priority': ['3']})
+
+    result = build_schedule(scored, equipment_df, issues_df, CURRENT_DATE).set_index('equipment_id')
+    assert result.loc['EQ-0003', 'maintenance_type'] == 'PM03'
+    assert result.loc['EQ-0003', 'priority'] == 'Medium'
+    assert (result.drop('EQ-0003')['priority'] == 'Low').all()
+
+
+def test_no_maintenance_gives_empty_schedule():
+    equipment_df, scored, issues_df = make_fleet()
+    scored['action'] = 0
+
+    result = build_schedule(scored, equipment_df, issues_df, CURRENT_DATE)
+    assert result.empty
+    assert list(result.columns) == list(loop_schedule(
+        scored.assign(action=1).head(1), equipment_df, issues_df, CURRENT_DATE
+    ).columns)
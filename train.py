@@ -1,53 +1,76 @@
+import argparse
 import torch
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
 import json
+import warnings
 
-from models.maintenance_env import MaintenanceEnv
-from models.dqn_agent import MaintenanceAgent
-from utils.data_generator import MaintenanceDataGenerator
+from models.maintenance_env import MaintenanceEnv, SAMPLING_MODES
+from models.dqn_agent import MaintenanceAgent, replay_path
+from models.replay_buffer import MemmapReplayBuffer
+from utils.data_generator import cached_dataset
+from utils.fleet_scoring import score_equipment, score_fleet_sharded, DEFAULT_MODEL_PATH
+from utils.schedule_rules import build_schedule
 
-def train_model(num_episodes=1000, batch_size=64):
-    # Generate or load training data
-    data_gen = MaintenanceDataGenerator(num_machines=100)
-    equipment_df, history_df, issues_df = data_gen.generate_all_data()
+# Latest weights and training state, written whenever the replay buffer is flushed.
+# Without a replay_dir, the in-RAM buffer is saved next to it (replay_path(RESUME_PATH))
+RESUME_PATH = 'models/saved/maintenance_dqn_resume.pth'
+
+def save_resume_point(agent, best_reward, replay_dir=None):
+    """Write the resume checkpoint together with the replay buffer it matches"""
+    agent.save(RESUME_PATH, metadata={'best_reward': float(best_reward)})
+    if not replay_dir:
+        agent.save_memory(replay_path(RESUME_PATH))
+
+def train_model(num_episodes=1000, batch_size=64, seed=0, memory_size=10000, replay_dir=None, resume=False,
+                sampling='issues', checkpoint_every=50):
+    # Generate training data, or reuse the cached dataset for this seed
+    equipment_df, history_df, issues_df = cached_dataset(num_machines=100, seed=seed)
     
-    # Initialize environment and agent
-    env = MaintenanceEnv(equipment_df, history_df, issues_df)
+    # Initialize environment and agent; sampling picks how episodes choose their equipment
+    env = MaintenanceEnv(equipment_df, history_df, issues_df, sampling=sampling, seed=seed)
     state_size = env.observation_space.shape[0]
     action_size = env.action_space.n
     
+    # With replay_dir, experience is kept in a memory-mapped buffer on disk
+    # that can be much larger than RAM and survives restarts
     agent = MaintenanceAgent(
         state_size=state_size,
         action_size=action_size,
-        batch_size=batch_size
+        batch_size=batch_size,
+        memory_size=memory_size,
+        replay_dir=replay_dir
     )
     
     # Training metrics
     best_reward = float('-inf')
     training_history = []
     
+    if resume:
+        # Continue from the last resume point's weights, optimizer state,
+        # epsilon and step count, and its experience unless the replay_dir
+        # buffer already holds it
+        if not os.path.exists(RESUME_PATH):
+            raise FileNotFoundError(f"No resume checkpoint at {RESUME_PATH}, start a run without --resume first")
+        progress = agent.load(RESUME_PATH)
+        best_reward = progress.get('best_reward', best_reward)
+        if replay_dir:
+            resumed_capacity = agent.memory.capacity  # A reopened buffer keeps its own capacity
+        else:
+            resume_replay = replay_path(RESUME_PATH)
+            resumed_capacity = None
+            if os.path.exists(os.path.join(resume_replay, 'meta.json')):
+                resumed_capacity = MemmapReplayBuffer(resume_replay, state_size=state_size).capacity
+            agent.load_memory(resume_replay)
+        if resumed_capacity is not None and resumed_capacity != memory_size:
+            warnings.warn(f"Resumed replay buffer was created with capacity {resumed_capacity}, "
+                          f"not --memory-size {memory_size}")
+    
     # Training loop
     for episode in range(num_episodes):
-        state = env.reset()
-        total_reward = 0
-        done = False
-        
-        while not done:
-            # Select and perform action
-            action = agent.act(state)
-            next_state, reward, done, _ = env.step(action)
-            
-            # Store experience in memory
-            agent.remember(state, action, reward, next_state, done)
-            
-            # Train the network
-            loss = agent.train()
-            
-            state = next_state
-            total_reward += reward
+        total_reward, loss = run_training_episode(agent, env)
         
         # Save training metrics
         training_history.append({
@@ -58,10 +81,15 @@ def train_model(num_episodes=1000, batch_size=64):
         })
         
         # Save best model
-        if total_reward > best_reward:
+        improved = total_reward > best_reward
+        if improved:
             best_reward = total_reward
             agent.save(f'models/saved/maintenance_dqn_best.pth')
         
+        # Saving flushes a memory-mapped buffer; keep a resume point that matches it
+        if improved or (episode + 1) % checkpoint_every == 0:
+            save_resume_point(agent, best_reward, replay_dir)
+        
         # Log progress
         if (episode + 1) % 10 == 0:
             print(f"Episode {episode + 1}/{num_episodes}, "
@@ -73,77 +101,90 @@ def train_model(num_episodes=1000, batch_size=64):
     history_df = pd.DataFrame(training_history)
     history_df.to_csv('data/training_history.csv', index=False)
     
-    # Save final model
+    # Save final model, and the replay buffer for warm-started fine-tuning
     agent.save('models/saved/maintenance_dqn_final.pth')
+    save_resume_point(agent, best_reward, replay_dir)
+    agent.save_memory(replay_path(DEFAULT_MODEL_PATH))
     
     return agent, history_df
 
+def run_training_episode(agent, env):
+    """Play one episode, training the agent after every step.
+    
+    Returns the total reward and the last training loss.
+    """
+    state = env.reset()
+    total_reward = 0
+    loss = 0
+    done = False
+    
+    while not done:
+        # Select and perform action
+        action = agent.act(state)
+        next_state, reward, done, _ = env.step(action)
+        
+        # Store experience in memory
+        agent.remember(state, action, reward, next_state, done)
+        
+        # Train the network
+        loss = agent.train()
+        
+        state = next_state
+        total_reward += reward
+    
+    return total_reward, loss
+
 def generate_maintenance_schedule(agent, env, num_days=30):
     """Generate maintenance schedule for all equipment"""
-    schedule = []
     current_date = datetime.now()
+    scored = score_equipment(env, agent, env.equipment_df, current_date)
+    return build_schedule(scored, env.equipment_df, env.current_issues_df, current_date)
+
+def generate_sharded_schedule(equipment_df, history_df, issues_df, model_path=DEFAULT_MODEL_PATH,
+                              shard_key='functional_location', max_workers=None, shards=None):
+    """Generate maintenance schedule with equipment scored per shard in a process pool"""
+    current_date = datetime.now()
+    scored, timings = score_fleet_sharded(
+        equipment_df, history_df, issues_df,
+        model_path=model_path,
+        shard_key=shard_key,
+        current_date=current_date,
+        max_workers=max_workers,
+        shards=shards
+    )
     
-    for _, equipment in env.equipment_df.iterrows():
-        # Get equipment state
-        env.current_equipment = equipment
-        env.current_date = current_date
-        state = env._get_state()
-        
-        # Get maintenance decision and probability
-        actions, probs = agent.predict_maintenance(state.reshape(1, -1))
-        maintenance_needed = actions[0] == 1
-        confidence = probs[0][1]  # Probability of maintenance action
-        
-        if maintenance_needed:
-            # Get current issues for this equipment
-            equipment_issues = env.current_issues_df[env.current_issues_df['equipment_id'] == equipment.name]
-            highest_priority = int(equipment_issues['priority'].min()) if not equipment_issues.empty else 4
-            
-            # Determine maintenance type based on issue type and priority
-            issue_types = equipment_issues['notification_type'].unique() if not equipment_issues.empty else []
-            if 'HYDR' in issue_types or highest_priority == 1:
-                maint_type = 'PM03'  # Emergency maintenance for hydraulic issues or priority 1
-            elif 'MECH' in issue_types or 'ELEC' in issue_types or highest_priority == 2:
-                maint_type = 'PM02'  # Corrective maintenance for mechanical/electrical issues or priority 2
-            else:
-                maint_type = 'PM01'  # Preventive maintenance for other cases
-            
-            # Calculate days until maintenance based on priority
-            if highest_priority == 1:
-                days_until_maintenance = 1  # Next day for critical issues
-            elif highest_priority == 2:
-                days_until_maintenance = max(2, min(3, int(5 * (1 - confidence))))  # 2-3 days for high priority
-            elif highest_priority == 3:
-                days_until_maintenance = max(7, min(14, int(14 * (1 - confidence))))  # 1-2 weeks for medium priority
-            else:
-                days_until_maintenance = max(14, min(30, int(30 * (1 - confidence))))  # 2-4 weeks for low priority
-            
-            # Map priority to text
-            priority_map = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
-            priority = priority_map.get(highest_priority, 'Low')
-            
-            schedule.append({
-                'equipment_id': equipment.name,
-                'equipment_type': equipment['equipment_type'],
-                'functional_location': equipment['functional_location'],
-                'manufacturer': equipment['manufacturer'],
-                'suggested_date': (current_date + pd.Timedelta(days=days_until_maintenance)).strftime('%Y-%m-%d'),
-                'maintenance_type': maint_type,
-                'priority': priority,
-                'confidence': float(confidence),
-                'breakdown_risk': float(state[5]),
-                'estimated_duration': float(env._estimate_maintenance_cost() / 100)  # Rough estimate in hours
-            })
-    
-    return pd.DataFrame(schedule)
+    for timing in timings:
+        print(f"Shard {timing['shard']}: {timing['equipment']} equipment, "
+              f"setup {timing['setup_seconds']:.2f}s, scoring {timing['scoring_seconds']:.2f}s")
+    
+    return build_schedule(scored, equipment_df, issues_df, current_date), timings
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the maintenance DQN agent')
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--memory-size', type=int, default=10000, help='Replay buffer capacity in transitions')
+    parser.add_argument('--replay-dir', default=None,
+                        help='Keep the replay buffer in memory-mapped files in this directory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from maintenance_dqn_resume.pth and the saved replay buffer')
+    parser.add_argument('--sampling', choices=SAMPLING_MODES, default='issues',
+                        help='Weight episode starts by open issues, breakdown risk or uniformly')
+    parser.add_argument('--checkpoint-every', type=int, default=50,
+                        help='Episodes between resume checkpoints (also written on every new best)')
+    args = parser.parse_args()
+    
     # Train model
-    agent, history = train_model()
+    agent, history = train_model(
+        num_episodes=args.episodes,
+        memory_size=args.memory_size,
+        replay_dir=args.replay_dir,
+        resume=args.resume,
+        sampling=args.sampling,
+        checkpoint_every=args.checkpoint_every
+    )
     
     # Generate sample schedule
-    data_gen = MaintenanceDataGenerator()
-    equipment_df, history_df, issues_df = data_gen.generate_all_data()
+    equipment_df, history_df, issues_df = cached_dataset(num_machines=10, seed=1)
     env = MaintenanceEnv(equipment_df, history_df, issues_df)
     
     schedule_df = generate_maintenance_schedule(agent, env)
@@ -3,11 +3,18 @@ sap.ui.define(
   function (Controller, MessageToast, MessageBox) {
     "use strict";
 
+    // Rows fetched from /api/schedule per request
+    var PAGE_SIZE = 50;
+
     return Controller.extend("maintenance.scheduler.controller.Main", {
       onInit: function () {
         this.getView().setModel(
           new sap.ui.model.json.JSONModel({
             scheduleData: [],
+            scheduleCount: 0,
+            orderBy: "priority",
+            maintenanceType: "",
+            functionalLocation: "",
           })
         );
       },
@@ -27,6 +34,8 @@ sap.ui.define(
           return;
         }
 
+        // The first page comes back with the upload, in the current sort and filters
+        fileUploader.setUploadUrl("/api/upload_issues?" + this._queryParams(0).toString());
         fileUploader.upload();
       },
 
@@ -47,11 +56,13 @@ sap.ui.define(
             return;
           }
 
-          // Update the model with schedule data
-          var oModel = this.getView().getModel();
-          oModel.setProperty("/scheduleData", response);
+          // Remember which result to page through and export on download
+          this._scheduleId = response.result_id;
 
-          // Show the table
+          // The upload response carries the first page; the table grows from there
+          var oModel = this.getView().getModel();
+          oModel.setProperty("/scheduleData", response.results);
+          oModel.setProperty("/scheduleCount", response.count);
           this.getView().byId("scheduleTable").setVisible(true);
           
           MessageToast.show("Schedule generated successfully");
@@ -60,12 +71,91 @@ sap.ui.define(
         }
       },
 
+      handleTableUpdateFinished: function (oEvent) {
+        // Keep one page fetched ahead of the rows on screen, so the table's
+        // growing trigger (scrolling to the end) always has rows to show
+        var oModel = this.getView().getModel();
+        var iLoaded = oModel.getProperty("/scheduleData").length;
+        if (
+          this._scheduleId &&
+          oEvent.getParameter("actual") + PAGE_SIZE > iLoaded &&
+          iLoaded < oModel.getProperty("/scheduleCount")
+        ) {
+          this._loadSchedule(false);
+        }
+      },
+
+      handleQueryChange: function () {
+        // Sorting and filtering happen on the server, so start from the first page
+        if (this._scheduleId) {
+          this._loadSchedule(true);
+        }
+      },
+
+      _queryParams: function (iSkip) {
+        var oModel = this.getView().getModel();
+        var params = new URLSearchParams({
+          $top: PAGE_SIZE,
+          $skip: iSkip,
+          $orderby: oModel.getProperty("/orderBy"),
+        });
+        if (oModel.getProperty("/maintenanceType")) {
+          params.set("maintenance_type", oModel.getProperty("/maintenanceType"));
+        }
+        if (oModel.getProperty("/functionalLocation")) {
+          params.set("functional_location", oModel.getProperty("/functionalLocation"));
+        }
+        return params;
+      },
+
+      _loadSchedule: function (bReset) {
+        // One page fetch at a time; a reset supersedes whatever is in flight
+        if (this._loading && !bReset) {
+          return this._loading;
+        }
+        var oModel = this.getView().getModel();
+        var aLoaded = bReset ? [] : oModel.getProperty("/scheduleData");
+        var params = this._queryParams(aLoaded.length);
+        params.set("result_id", this._scheduleId);
+
+        var that = this;
+        var iRequest = (this._request = (this._request || 0) + 1);
+        this._loading = fetch("/api/schedule?" + params.toString())
+          .then(function (response) {
+            return response.json().then(function (body) {
+              if (!response.ok) {
+                throw new Error(body.error || response.statusText);
+              }
+              return body;
+            });
+          })
+          .then(function (body) {
+            if (iRequest === that._request) {
+              oModel.setProperty("/scheduleData", aLoaded.concat(body.results));
+              oModel.setProperty("/scheduleCount", body.count);
+            }
+          })
+          .catch(function (error) {
+            MessageBox.error("Could not load the schedule: " + error.message);
+          })
+          .finally(function () {
+            if (iRequest === that._request) {
+              that._loading = null;
+            }
+          });
+        return this._loading;
+      },
+
       handleTemplateDownload: function () {
         window.location.href = "/api/download_template";
       },
 
       handleScheduleDownload: function () {
-        window.location.href = "/api/download_schedule";
+        var url = "/api/download_schedule";
+        if (this._scheduleId) {
+          url += "?result_id=" + encodeURIComponent(this._scheduleId);
+        }
+        window.location.href = url;
       },
     });
   }
@@ -1,11 +1,21 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import glob
 import os
+import tempfile
+
+# Bump whenever generated data changes, so cached datasets are regenerated
+GENERATOR_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'cache')
+
+_dataset_cache = {}
 
 class MaintenanceDataGenerator:
-    def __init__(self, num_machines=10):
+    def __init__(self, num_machines=10, reference_date=None):
         self.num_machines = num_machines
+        self.reference_date = reference_date  # "Now" for generated dates, datetime.now() if None
         self.equipment_types = ['FLC', 'RTG', 'QC', 'RS', 'TT']  # Different equipment types
         self.manufacturers = ['GE', 'Siemens', 'ABB', 'Schneider', 'Mitsubishi', 'Hyundai']
         self.criticality_weights = {'A': 0.3, 'B': 0.4, 'C': 0.3}  # Distribution of criticality
@@ -62,8 +72,11 @@ class MaintenanceDataGenerator:
         
         return pd.DataFrame(equipment_data)
 
+    def _now(self):
+        return self.reference_date if self.reference_date is not None else datetime.now()
+
     def _create_equipment_record(self, eq_id, eq_type):
-        current_date = datetime.now()
+        current_date = self._now()
         installation_date = current_date - timedelta(days=np.random.randint(365, 1825))  # 1-5 years old
         warranty_period = np.random.randint(730, 1825)  # 2-5 years warranty
         
@@ -134,10 +147,11 @@ class MaintenanceDataGenerator:
             'PM05': ['Visual Inspection', 'Performance Check', 'Safety Inspection']
         }
         
+        now = self._now()
         data = []
         for _, equipment in equipment_df.iterrows():
             current_date = equipment['installation_date']
-            while current_date < datetime.now():
+            while current_date < now:
                 # Scheduled maintenance
                 if np.random.random() < 0.8:  # 80% compliance rate
                     maint_type = 'PM01'
@@ -195,6 +209,7 @@ class MaintenanceDataGenerator:
             'PERF': ['Low Efficiency', 'Quality Issues', 'Speed Variation']
         }
         
+        now = self._now()
         data = []
         for _, equipment in equipment_df.iterrows():
             # 20% chance of current issue
@@ -206,10 +221,10 @@ class MaintenanceDataGenerator:
                     'notification_type': category,
                     'issue_description': np.random.choice(issue_types[category]),
                     'priority': np.random.choice(['1', '2', '3', '4']),  # 1=Highest
-                    'reported_date': datetime.now() - timedelta(days=np.random.randint(1, 30)),
+                    'reported_date': now - timedelta(days=np.random.randint(1, 30)),
                     'reported_by': f'USER-{np.random.randint(1000, 9999)}',
                     'status': 'OSNO',  # Outstanding Notification
-                    'malfunction_start': datetime.now() - timedelta(days=np.random.randint(1, 5)),
+                    'malfunction_start': now - timedelta(days=np.random.randint(1, 5)),
                     'planned_start_date': None,
                     'estimated_cost': np.random.uniform(1000, 5000),
                     'impact': np.random.choice(['Production Stop', 'Quality Impact', 'Performance Degradation', 'Safety Risk'])
@@ -217,12 +232,15 @@ class MaintenanceDataGenerator:
         
         return pd.DataFrame(data)
     
-    def generate_all_data(self, equipment_ids=None):
-        """Generate all datasets and save to CSV"""
+    def generate_all_data(self, equipment_ids=None, save=True):
+        """Generate all datasets and save to CSV (in memory only with save=False)"""
         equipment_df = self.generate_equipment_data(equipment_ids)
         history_df = self.generate_maintenance_history(equipment_df)
         issues_df = self.generate_current_issues(equipment_df)
         
+        if not save:
+            return equipment_df, history_df, issues_df
+        
         # Save to CSV files
         data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sample_data')
         os.makedirs(data_dir, exist_ok=True)
@@ -231,4 +249,84 @@ class MaintenanceDataGenerator:
         history_df.to_csv(os.path.join(data_dir, 'maintenance_history.csv'), index=False)
         issues_df.to_csv(os.path.join(data_dir, 'current_issues.csv'), index=False)
         
-        return equipment_df, history_df, issues_df
\ No newline at end of file
+        return equipment_df, history_df, issues_df
+
+
+def cached_dataset(num_machines=100, seed=0, cache_dir=DEFAULT_CACHE_DIR, reference_date=None):
+    """Generated (equipment, history, issues) frames, cached by (seed, num_machines, reference date, GENERATOR_VERSION).
+
+    Generated dates are anchored to the start of reference_date (today by
+    default), so cached data is what generation would produce for that day;
+    entries for other days are dropped when a new day's data is cached.
+    Nothing is written to data/sample_data and the global numpy random state
+    is left untouched. Frames are kept in memory for this process and pickled
+    to cache_dir (None disables the disk cache) for later runs; a cache file
+    that cannot be read back is regenerated and overwritten. Callers get
+    copies they are free to modify.
+    """
+    reference_date = datetime.combine(reference_date or date.today(), datetime.min.time())
+    day = reference_date.strftime('%Y%m%d')
+    key = (seed, num_machines, day, GENERATOR_VERSION)
+    if key not in _dataset_cache:
+        path = None
+        if cache_dir:
+            path = os.path.join(cache_dir, f'dataset_v{GENERATOR_VERSION}_n{num_machines}_s{seed}_d{day}.pkl')
+
+        frames = _read_cache(path) if path and os.path.exists(path) else None
+        if frames is None:
+            random_state = np.random.get_state()
+            try:
+                np.random.seed(seed)
+                generator = MaintenanceDataGenerator(num_machines=num_machines, reference_date=reference_date)
+                frames = generator.generate_all_data(save=False)
+            finally:
+                np.random.set_state(random_state)
+            if path:
+                _write_cache(frames, path)
+                _remove_stale_cache(cache_dir, num_machines, seed, path)
+        for stale_key in [k for k in _dataset_cache if k[:2] == key[:2] and k != key]:
+            del _dataset_cache[stale_key]
+        _dataset_cache[key] = frames
+
+    return tuple(frame.copy() for frame in _dataset_cache[key])
+
+
+def _remove_stale_cache(cache_dir, num_machines, seed, path):
+    """Delete this fleet's cached datasets for other days or generator versions"""
+    for pattern in (f'dataset_v*_n{num_machines}_s{seed}_d*.pkl', f'dataset_v*_n{num_machines}_s{seed}.pkl'):
+        for stale_path in glob.glob(os.path.join(cache_dir, pattern)):
+            if stale_path != path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+
+
+def _read_cache(path):
+    """Unpickle cached frames; a corrupted, truncated or unpicklable file is a cache miss"""
+    try:
+        frames = pd.read_pickle(path)
+    except Exception as e:
+        print(f"Ignoring unreadable dataset cache at {path}: {e}")
+        return None
+    if not (isinstance(frames, tuple) and len(frames) == 3
+            and all(isinstance(frame, pd.DataFrame) for frame in frames)):
+        print(f"Ignoring dataset cache at {path}: not three DataFrames")
+        return None
+    return frames
+
+
+def _write_cache(frames, path):
+    """Atomically pickle frames; a read-only cache directory only costs the speedup"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.pkl.tmp')
+        os.close(fd)
+        try:
+            pd.to_pickle(frames, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except OSError as e:
+        print(f"Could not cache dataset at {path}: {e}")
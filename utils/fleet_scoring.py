@@ -0,0 +1,392 @@
+import numpy as np
+import pandas as pd
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from models.maintenance_env import MaintenanceEnv, STATE_FEATURES
+from models.dqn_agent import MaintenanceAgent
+from models.distilled_policy import DistilledPolicy
+from models.policy_ensemble import PolicyEnsemble
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = 'models/saved/maintenance_dqn_best.pth'
+
+
+def load_policy(model_path=DEFAULT_MODEL_PATH, required=False):
+    """Load a scoring policy: a distilled lookup table (.npz) or a DQN checkpoint.
+
+    A list of paths loads a PolicyEnsemble whose first path is the primary;
+    its shadows are required. A missing checkpoint leaves a DQN with random
+    weights unless required, which raises FileNotFoundError instead, so a
+    shadow is never compared as a random policy.
+    """
+    if isinstance(model_path, (list, tuple)):
+        policies = [load_policy(path, required=i > 0) for i, path in enumerate(model_path)]
+        return PolicyEnsemble(policies, names=model_path)
+    if required and not os.path.exists(model_path):
+        raise FileNotFoundError(f"No checkpoint at {model_path}")
+    if model_path.endswith('.npz'):
+        return DistilledPolicy.load(model_path)
+    agent = MaintenanceAgent(state_size=len(STATE_FEATURES), action_size=2)
+    agent.load(model_path)
+    return agent
+
+
+def score_equipment(env, agent, equipment_df, current_date, workload_factor=None, skip_errors=False):
+    """Compute states and maintenance decisions for every equipment row.
+
+    Returns a DataFrame indexed like equipment_df with one column per state
+    feature plus 'action', 'confidence' (probability of the maintenance
+    action) and 'estimated_cost' (only filled in for maintained equipment).
+    """
+    env.current_date = current_date
+    labels, states, rows = [], [], []
+    for position, (label, equipment) in enumerate(equipment_df.iterrows()):
+        try:
+            env.current_equipment = equipment
+            state = env._get_state()
+        except Exception as e:
+            if not skip_errors:
+                raise
+            logger.error(f"Error processing equipment {label}: {str(e)}")
+            continue
+        if workload_factor is not None:
+            # Workload is counted over the whole fleet, not just this shard
+            state[7] = workload_factor
+        labels.append(label)
+        states.append(state)
+        rows.append(position)
+
+    scored = _scored_frame(labels, states, equipment_df.index.name)
+    if scored.empty:
+        return scored
+
+    # One batched forward pass for the whole fleet
+    actions = _predict(agent, scored[STATE_FEATURES].values, scored)
+
+    estimated_costs = scored['estimated_cost'].values.copy()
+    for i in np.flatnonzero(actions == 1):
+        env.current_equipment = equipment_df.iloc[rows[i]]
+        estimated_costs[i] = env._estimate_maintenance_cost()
+    scored['estimated_cost'] = estimated_costs
+
+    return scored
+
+
+def _predict(predictor, states, scored):
+    """Fill in the predictor's action and confidence columns and return its actions.
+
+    A PolicyEnsemble scores all its members in the same pass; the shadow
+    members' decisions go into shadow<i>_action and shadow<i>_confidence
+    columns, numbered by their position in the ensemble.
+    """
+    if isinstance(predictor, PolicyEnsemble):
+        all_actions, all_probs = predictor.predict_all(states)
+        for i in range(1, len(predictor)):
+            scored[f'shadow{i}_action'] = all_actions[i]
+            scored[f'shadow{i}_confidence'] = all_probs[i, :, 1]
+        actions, probs = all_actions[0], all_probs[0]
+    else:
+        actions, probs = predictor.predict_maintenance(states)
+    scored['action'] = actions
+    scored['confidence'] = probs[:, 1]
+    return actions
+
+
+def shadow_disagreement(scored, names):
+    """Per shadow policy, how its decisions on the scored fleet differ from the primary's.
+
+    names are the ensemble's member names, primary first. Shadows without
+    columns in scored (e.g. an empty fleet) are skipped.
+    """
+    stats = []
+    for i, name in enumerate(names[1:], 1):
+        column = f'shadow{i}_action'
+        if column not in scored.columns or scored.empty:
+            continue
+        primary = scored['action'].values.astype(int)
+        shadow = scored[column].values.astype(int)
+        stats.append({
+            'model': name,
+            'equipment': len(scored),
+            'disagreements': int((primary != shadow).sum()),
+            'agreement': float((primary == shadow).mean()),
+            'maintenance_rate_primary': float(primary.mean()),
+            'maintenance_rate_shadow': float(shadow.mean()),
+            'added_maintenance': int(((shadow == 1) & (primary == 0)).sum()),
+            'dropped_maintenance': int(((shadow == 0) & (primary == 1)).sum()),
+            'confidence_mae': float(np.abs(scored[f'shadow{i}_confidence'].values - scored['confidence'].values).mean()),
+        })
+    return stats
+
+
+def _scored_frame(labels, states, index_name=None):
+    """Build an (unscored) result frame from equipment labels and state vectors"""
+    scored = pd.DataFrame(
+        np.array(states, dtype=np.float32).reshape(-1, len(STATE_FEATURES)),
+        columns=STATE_FEATURES,
+        index=pd.Index(labels, name=index_name)
+    )
+    scored['action'] = 0
+    scored['confidence'] = 0.0
+    scored['estimated_cost'] = np.nan
+    return scored
+
+
+def score_fleet_features(features, predictor, issues_df, current_date):
+    """Score the whole fleet from precomputed FleetFeatures in one vectorized pass.
+
+    predictor is anything with MaintenanceAgent.predict_maintenance's
+    contract. Rows the env could not score (unknown criticality) are dropped.
+    """
+    states = features.states(issues_df, current_date)
+    valid = features.valid
+    scored = _scored_frame(features.labels[valid], states[valid], features.labels.name)
+    if scored.empty:
+        return scored
+
+    actions = _predict(predictor, states[valid], scored)
+    scored['estimated_cost'] = np.where(actions == 1, features.estimated_costs()[valid], np.nan)
+    return scored
+
+
+def _shard_numbers(equipment_df, shard_key):
+    """Shard number of every equipment row, and the shard values in number order (sorted)"""
+    numbers = equipment_df.groupby(shard_key, sort=True, dropna=False).ngroup().values
+    _, first_rows = np.unique(numbers, return_index=True)
+    return numbers, list(equipment_df[shard_key].values[first_rows])
+
+
+def _split_fleet(equipment_df, history_df, issues_df, row_groups):
+    """Split equipment, history and issues by a group number per equipment row.
+
+    Every equipment id is mapped to its group once, so each frame is split
+    with a single groupby instead of being filtered per group. Rows in
+    negative groups are dropped. Returns a dict of group -> (equipment,
+    history, issues).
+    """
+    if 'equipment_id' in equipment_df.columns:
+        equipment_ids = equipment_df['equipment_id'].values
+    else:
+        equipment_ids = equipment_df.index.values
+    group_of = pd.Series(row_groups, index=equipment_ids)
+    group_of = group_of[~group_of.index.duplicated()]
+
+    def split(frame, groups):
+        return dict(iter(frame.groupby(groups, sort=False)))
+
+    equipment = split(equipment_df, row_groups)
+    history = split(history_df, history_df['equipment_id'].map(group_of).fillna(-1).astype(int).values)
+    issues = split(issues_df, issues_df['equipment_id'].map(group_of).fillna(-1).astype(int).values)
+    return {
+        group: (equipment[group], history.get(group, history_df.iloc[:0]), issues.get(group, issues_df.iloc[:0]))
+        for group in sorted(equipment) if group >= 0
+    }
+
+
+def partition_fleet(equipment_df, history_df, issues_df, shard_key='functional_location'):
+    """Split equipment, history and issues by a shard key.
+
+    Returns a dict of shard value -> (equipment, history, issues), sorted by
+    shard value. Equipment keeps its original index so results can be merged
+    back in fleet order.
+    """
+    numbers, shard_values = _shard_numbers(equipment_df, shard_key)
+    return {
+        shard_values[number]: frames
+        for number, frames in _split_fleet(equipment_df, history_df, issues_df, numbers).items()
+    }
+
+
+# Tasks per pool worker. Small shards are scored in batches, since every task
+# pays for its own env and a round trip to the pool, which dominates the work
+# for plants of a few machines.
+SHARD_BATCHES_PER_WORKER = 4
+
+
+# Policy of a pool worker process, loaded by the pool initializer and reloaded
+# only if the requested checkpoints change
+_worker_policy = None
+_worker_policy_key = None
+
+
+def _worker_load_policy(model_path):
+    global _worker_policy, _worker_policy_key
+    paths = model_path if isinstance(model_path, (list, tuple)) else [model_path]
+    key = tuple((path, os.path.getmtime(path) if os.path.exists(path) else None) for path in paths)
+    if _worker_policy is None or key != _worker_policy_key:
+        _worker_policy, _worker_policy_key = load_policy(model_path), key
+    return _worker_policy
+
+
+def _score_shard(shard_value, equipment_df, history_df, issues_df, model_path,
+                 current_date, workload_factor, skip_errors):
+    """Process pool entry point: score one shard with its own env and the worker's policy"""
+    start = time.perf_counter()
+    env = MaintenanceEnv(equipment_df, history_df, issues_df)
+    agent = _worker_load_policy(model_path)
+    loaded = time.perf_counter()
+
+    scored = score_equipment(env, agent, equipment_df, current_date,
+                             workload_factor=workload_factor, skip_errors=skip_errors)
+    done = time.perf_counter()
+
+    timing = {
+        'shard': shard_value,
+        'equipment': len(equipment_df),
+        'setup_seconds': loaded - start,
+        'scoring_seconds': done - loaded,
+        'total_seconds': done - start,
+        'pid': os.getpid()
+    }
+    return shard_value, scored, timing
+
+
+def _init_worker(model_path):
+    # Shards already run in parallel, keep torch from oversubscribing cores
+    import torch
+    torch.set_num_threads(1)
+    _worker_load_policy(model_path)
+
+
+# Process pool reused across sharded scoring calls. Pools do not survive a
+# fork, so it is keyed by pid as well as size.
+_pool = None
+# Workers start from a fork server (spawned where that is unavailable), never
+# forked from the caller: the server runs warmup and request threads, and a
+# child forked from a multithreaded process can deadlock on a lock one of them held
+_pool_context = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+if _pool_context.get_start_method() == 'forkserver':
+    # The fork server imports this module (and torch) once, workers fork from it
+    _pool_context.set_forkserver_preload([__name__])
+_pool_config = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers, model_path):
+    global _pool, _pool_config
+    config = (os.getpid(), max_workers)
+    with _pool_lock:
+        if _pool is None or _pool_config != config:
+            if _pool is not None and _pool_config[0] == os.getpid():
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context,
+                                        initializer=_init_worker, initargs=(model_path,))
+            _pool_config = config
+    return _pool
+
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_config = None, None
+    pool.shutdown(wait=False)
+
+
+def score_fleet_sharded(equipment_df, history_df, issues_df, model_path=DEFAULT_MODEL_PATH,
+                        shard_key='functional_location', current_date=None, max_workers=None,
+                        shards=None, skip_errors=False):
+    """Score the fleet shard by shard in a process pool.
+
+    shards optionally restricts scoring to a subset of shard values, e.g. to
+    reschedule a single plant. model_path may be a list of paths (see
+    load_policy) to score shadow policies in every shard. The process pool is
+    kept between calls and each worker loads the policy once. Consecutive
+    shards are batched into a few tasks per worker. Returns the scored
+    DataFrame (in the same order as equipment_df) and a list of per-batch
+    timings, whose 'shard' is the shard value or a first..last range.
+    """
+    if current_date is None:
+        current_date = datetime.now()
+
+    # Workload factor depends on the whole fleet's history, compute it once
+    fleet_env = MaintenanceEnv(equipment_df, history_df, issues_df)
+    fleet_env.current_date = current_date
+    workload_factor = fleet_env._get_workload_factor()
+
+    numbers, shard_values = _shard_numbers(equipment_df, shard_key)
+    if shards is not None:
+        wanted = set(shards)
+        selected = [number for number, value in enumerate(shard_values) if value in wanted]
+    else:
+        selected = list(range(len(shard_values)))
+
+    results = []
+    timings = []
+    if selected:
+        max_workers = max_workers or os.cpu_count() or 1
+        # Consecutive shards go into one batch, a few batches per worker
+        batches = np.array_split(selected, min(len(selected), max_workers * SHARD_BATCHES_PER_WORKER))
+        batch_of_shard = np.full(len(shard_values), -1)
+        for batch, batch_shards in enumerate(batches):
+            batch_of_shard[batch_shards] = batch
+        partitions = _split_fleet(equipment_df, history_df, issues_df, batch_of_shard[numbers])
+
+        pool = _get_pool(max_workers, model_path)
+        try:
+            futures = []
+            for batch, (batch_equipment, batch_history, batch_issues) in partitions.items():
+                first, last = shard_values[batches[batch][0]], shard_values[batches[batch][-1]]
+                label = first if len(batches[batch]) == 1 else f"{first}..{last}"
+                futures.append((len(batches[batch]), pool.submit(
+                    _score_shard, label, batch_equipment, batch_history, batch_issues,
+                    model_path, current_date, workload_factor, skip_errors
+                )))
+            for shard_count, future in futures:
+                _, scored, timing = future.result()
+                timing['shards'] = shard_count
+                results.append(scored)
+                timings.append(timing)
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+
+    # Merge deterministically: restore fleet order regardless of completion order
+    if results:
+        scored = pd.concat(results, axis=0)
+    else:
+        scored = _scored_frame([], [], equipment_df.index.name)
+    selected = equipment_df.index[equipment_df.index.isin(scored.index)]
+    scored = scored.loc[~scored.index.duplicated()].reindex(selected)
+    scored['action'] = scored['action'].astype(int)
+
+    return scored, timings
+
+
+def score_fleet(equipment_df, history_df, issues_df, model_path=DEFAULT_MODEL_PATH,
+                shard_key=None, current_date=None, max_workers=None, skip_errors=False, agent=None):
+    """Score the fleet serially, or sharded when a shard key is given.
+
+    Returns the scored DataFrame and a list of per-shard timings (a single
+    entry for the serial path).
+    """
+    if current_date is None:
+        current_date = datetime.now()
+
+    if shard_key:
+        return score_fleet_sharded(equipment_df, history_df, issues_df, model_path=model_path,
+                                   shard_key=shard_key, current_date=current_date,
+                                   max_workers=max_workers, skip_errors=skip_errors)
+
+    start = time.perf_counter()
+    env = MaintenanceEnv(equipment_df, history_df, issues_df)
+    if agent is None:
+        agent = load_policy(model_path)
+    scored = score_equipment(env, agent, equipment_df, current_date, skip_errors=skip_errors)
+    timing = {
+        'shard': None,
+        'equipment': len(equipment_df),
+        'total_seconds': time.perf_counter() - start,
+        'pid': os.getpid()
+    }
+    return scored, [timing]
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+# Supported export formats: format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+DEFAULT_FORMAT = 'xlsx'
+
+RESULT_ID_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+
+class ScheduleStore:
+    """Keeps generated schedules on disk and renders exports on demand.
+
+    Schedules are stored as plain JSON keyed by a content hash, so every
+    gunicorn worker can serve a download for a result produced by another
+    worker. Exports are written the first time they are requested and reused
+    for later downloads of the same result. The issues file a schedule was
+    generated from is kept under the same id, so concurrent uploads never
+    overwrite each other.
+
+    Every save evicts results beyond the newest max_results or older than
+    max_age seconds (None disables either limit), together with their
+    exports and uploads. The latest result is always kept.
+    """
+
+    def __init__(self, base_dir='data', max_results=None, max_age=None):
+        self.results_dir = os.path.join(base_dir, 'results')
+        self.exports_dir = os.path.join(base_dir, 'exports')
+        self.uploads_dir = os.path.join(base_dir, 'uploads')
+        self.latest_path = os.path.join(self.results_dir, 'latest')
+        self.max_results = max_results
+        self.max_age = max_age
+
+    def save(self, schedule, upload=None):
+        """Store a schedule (list of row dicts) and return its result id.
+
+        upload is the raw issues file (bytes) the schedule was generated from.
+        """
+        payload = json.dumps(schedule, default=str).encode('utf-8')
+        result_id = hashlib.sha1(payload).hexdigest()[:16]
+
+        result_path = self._result_path(result_id)
+        if os.path.exists(result_path):
+            os.utime(result_path)  # Regenerated, so as fresh as a new result for eviction
+        else:
+            self._atomic_write(result_path, payload)
+        if upload is not None:
+            self._atomic_write(self.upload_path(result_id), upload)
+        self._atomic_write(self.latest_path, result_id.encode('utf-8'))
+
+        self.evict(keep=result_id)
+        return result_id
+
+    def evict(self, keep=None):
+        """Delete results over the count or age limit, plus exports and uploads
+        left without a result. Returns the evicted result ids."""
+        started = time.time()
+        results = []
+        for name in self._listdir(self.results_dir):
+            result_id, extension = os.path.splitext(name)
+            if extension == '.json' and RESULT_ID_PATTERN.match(result_id):
+                try:
+                    results.append((os.path.getmtime(os.path.join(self.results_dir, name)), result_id))
+                except FileNotFoundError:
+                    pass  # Evicted by another worker
+        results.sort(reverse=True)
+
+        keep = {keep, self.latest_result_id()}
+        cutoff = time.time() - self.max_age if self.max_age is not None else None
+        evicted = set()
+        for rank, (mtime, result_id) in enumerate(results):
+            over_count = self.max_results is not None and rank >= self.max_results
+            too_old = cutoff is not None and mtime < cutoff
+            if (over_count or too_old) and result_id not in keep:
+                self._remove(self._result_path(result_id))
+                evicted.add(result_id)
+
+        # Exports and uploads belong to a result; drop those whose result is
+        # gone. Files written since the listing may belong to a result another
+        # worker is saving right now, so they are left for the next eviction.
+        remaining = {result_id for _, result_id in results} - evicted
+        for directory in (self.exports_dir, self.uploads_dir):
+            for name in self._listdir(directory):
+                result_id = name.split('.', 1)[0]
+                if not RESULT_ID_PATTERN.match(result_id) or result_id in remaining or result_id in keep:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < started:
+                        self._remove(path)
+                except FileNotFoundError:
+                    pass
+        return sorted(evicted)
+
+    def latest_result_id(self):
+        """Return the id of the most recently saved schedule, if any"""
+        if not os.path.exists(self.latest_path):
+            return None
+        with open(self.latest_path) as f:
+            return f.read().strip() or None
+
+    def load_records(self, result_id):
+        """Load a stored schedule as a list of row dicts"""
+        with open(self._result_path(result_id)) as f:
+            return json.load(f)
+
+    def load(self, result_id):
+        """Load a stored schedule as a DataFrame"""
+        import pandas as pd
+
+        return pd.DataFrame(self.load_records(result_id))
+
+    def exists(self, result_id):
+        return bool(RESULT_ID_PATTERN.match(result_id)) and os.path.exists(self._result_path(result_id))
+
+    def upload_path(self, result_id):
+        if not RESULT_ID_PATTERN.match(result_id):
+            raise ValueError(f"Invalid result id: {result_id}")
+        return os.path.join(self.uploads_dir, f'{result_id}.csv')
+
+    def has_upload(self, result_id):
+        return bool(RESULT_ID_PATTERN.match(result_id)) and os.path.exists(self.upload_path(result_id))
+
+    def export(self, result_id, fmt=DEFAULT_FORMAT):
+        """Return the path of the export for a result, rendering it if needed"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        _, extension = EXPORT_FORMATS[fmt]
+        export_path = os.path.join(self.exports_dir, f'{result_id}.{extension}')
+        if os.path.exists(export_path):
+            return export_path
+
+        schedule_df = self.load(result_id)
+        os.makedirs(self.exports_dir, exist_ok=True)
+
+        # Render into a temporary file first so concurrent requests never
+        # serve a partially written export
+        fd, tmp_path = tempfile.mkstemp(dir=self.exports_dir, suffix=f'.{extension}.tmp')
+        os.close(fd)
+        try:
+            if fmt == 'csv':
+                schedule_df.to_csv(tmp_path, index=False)
+            elif fmt == 'parquet':
+                schedule_df.to_parquet(tmp_path, index=False)
+            else:
+                write_xlsx_streaming(schedule_df, tmp_path)
+            os.replace(tmp_path, export_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return export_path
+
+    def _result_path(self, result_id):
+        if not RESULT_ID_PATTERN.match(result_id):
+            raise ValueError(f"Invalid result id: {result_id}")
+        return os.path.join(self.results_dir, f'{result_id}.json')
+
+    def _listdir(self, directory):
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _atomic_write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def write_xlsx_streaming(schedule_df, path, sheet_name='Schedule'):
+    """Write a DataFrame to xlsx row by row in constant memory"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(list(schedule_df.columns))
+    for row in schedule_df.itertuples(index=False, name=None):
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def negotiate_format(requested=None, accept_header=None):
+    """Pick an export format from a query parameter or an Accept header.
+
+    The Accept header is matched by quality weight and specificity (with
+    werkzeug's best_match); wildcards prefer DEFAULT_FORMAT. Returns None if
+    neither names a supported format.
+    """
+    from werkzeug.datastructures import MIMEAccept
+    from werkzeug.http import parse_accept_header
+
+    if requested:
+        requested = requested.lower()
+        return requested if requested in EXPORT_FORMATS else None
+
+    if not accept_header or not accept_header.strip():
+        return DEFAULT_FORMAT
+
+    # Offer the default first, so */* and equal weights resolve to it
+    formats = [DEFAULT_FORMAT] + [fmt for fmt in EXPORT_FORMATS if fmt != DEFAULT_FORMAT]
+    mimetype = parse_accept_header(accept_header, MIMEAccept).best_match(
+        [EXPORT_FORMATS[fmt][0] for fmt in formats]
+    )
+    if mimetype is None:
+        return None
+    return next(fmt for fmt in formats if EXPORT_FORMATS[fmt][0] == mimetype)
@@ -0,0 +1,123 @@
+import bisect
+
+import numpy as np
+
+# Sortable columns; priority sorts by rank, Critical first
+PRIORITY_RANKS = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4}
+SORT_KEYS = ['priority', 'suggested_date', 'breakdown_risk']
+FILTER_KEYS = ['functional_location', 'maintenance_type']
+# Filters matching values that start with the given text, case-insensitively
+# (functional locations are hierarchical); the others match exactly
+PREFIX_FILTER_KEYS = ['functional_location']
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+class ScheduleIndex:
+    """Sort orders and filter postings for one stored schedule.
+
+    Built once per result (results are immutable, keyed by content hash), so
+    every page request is a few array operations: mask the precomputed sort
+    order with the filter postings and slice out $skip/$top rows.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        size = len(records)
+
+        # Stable ascending orders; ties keep schedule order
+        sort_values = {
+            'priority': [PRIORITY_RANKS.get(r.get('priority'), len(PRIORITY_RANKS)) for r in records],
+            'suggested_date': [str(r.get('suggested_date')) for r in records],
+            'breakdown_risk': [float(r.get('breakdown_risk') or 0.0) for r in records],
+        }
+        self.orders = {
+            key: np.argsort(np.array(values), kind='stable') if size else np.arange(0)
+            for key, values in sort_values.items()
+        }
+
+        # Column -> value -> row positions; prefix columns are keyed by the
+        # casefolded value, with the values sorted so a prefix is a range
+        self.postings = {}
+        self.sorted_values = {}
+        for key in FILTER_KEYS:
+            postings = {}
+            for position, record in enumerate(records):
+                value = record.get(key)
+                if key in PREFIX_FILTER_KEYS:
+                    if value is None:
+                        continue
+                    value = str(value).casefold()
+                postings.setdefault(value, []).append(position)
+            self.postings[key] = {value: np.array(rows) for value, rows in postings.items()}
+            if key in PREFIX_FILTER_KEYS:
+                self.sorted_values[key] = sorted(postings)
+
+    def __len__(self):
+        return len(self.records)
+
+    def query(self, top=DEFAULT_PAGE_SIZE, skip=0, orderby=None, descending=False, filters=None):
+        """Return (rows of the requested page, number of rows matching the filters).
+
+        filters maps a FILTER_KEYS column to the list of accepted values, or
+        of accepted prefixes for PREFIX_FILTER_KEYS.
+        """
+        if orderby is None:
+            order = np.arange(len(self))
+        else:
+            order = self.orders[orderby]
+        if descending:
+            order = order[::-1]
+
+        for key, values in (filters or {}).items():
+            mask = np.zeros(len(self), dtype=bool)
+            for value in values:
+                for rows in self._matching_postings(key, value):
+                    mask[rows] = True
+            order = order[mask[order]]
+
+        page = order[skip:skip + top]
+        return [self.records[i] for i in page], len(order)
+
+    def _matching_postings(self, key, value):
+        if key not in PREFIX_FILTER_KEYS:
+            rows = self.postings[key].get(value)
+            return [] if rows is None else [rows]
+        prefix = value.strip().casefold()
+        if not prefix:
+            return []
+        values = self.sorted_values[key]
+        start = bisect.bisect_left(values, prefix)
+        end = start
+        while end < len(values) and values[end].startswith(prefix):
+            end += 1
+        return [self.postings[key][value] for value in values[start:end]]
+
+
+def parse_schedule_query(args):
+    """Parse $top, $skip, $orderby and filter query parameters.
+
+    Returns the keyword arguments for ScheduleIndex.query; raises ValueError
+    with a client-facing message on invalid input.
+    """
+    try:
+        top = int(args.get('$top', DEFAULT_PAGE_SIZE))
+        skip = int(args.get('$skip', 0))
+    except ValueError:
+        raise ValueError("$top and $skip must be integers")
+    if top < 0 or skip < 0:
+        raise ValueError("$top and $skip must not be negative")
+    top = min(top, MAX_PAGE_SIZE)
+
+    orderby, descending = None, False
+    if args.get('$orderby'):
+        parts = args['$orderby'].split()
+        if parts[0] not in SORT_KEYS or len(parts) > 2 or (len(parts) == 2 and parts[1] not in ('asc', 'desc')):
+            raise ValueError(f"$orderby must be one of {', '.join(SORT_KEYS)}, optionally followed by asc or desc")
+        orderby, descending = parts[0], len(parts) == 2 and parts[1] == 'desc'
+
+    # Comma-separated values are alternatives, e.g. maintenance_type=PM02,PM03
+    filters = {key: args[key].split(',') for key in FILTER_KEYS if args.get(key)}
+
+    return {'top': top, 'skip': skip, 'orderby': orderby, 'descending': descending, 'filters': filters}
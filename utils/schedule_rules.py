@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+PRIORITY_NAMES = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
+SCHEDULE_COLUMNS = [
+    'equipment_id', 'equipment_type', 'functional_location', 'manufacturer', 'suggested_date',
+    'maintenance_type', 'priority', 'confidence', 'breakdown_risk', 'estimated_duration'
+]
+
+
+def summarize_issues(issues_df):
+    """Aggregate open issues per equipment_id: highest priority (lowest number)
+    and whether any hydraulic or mechanical/electrical notification is open"""
+    types = issues_df['notification_type']
+    issues = pd.DataFrame({
+        'priority': pd.to_numeric(issues_df['priority'], errors='coerce'),
+        'hydraulic': types.eq('HYDR'),
+        'mech_elec': types.isin(['MECH', 'ELEC']),
+    })
+    return issues.groupby(issues_df['equipment_id'].values).agg(
+        {'priority': 'min', 'hydraulic': 'any', 'mech_elec': 'any'}
+    )
+
+
+def build_schedule(scored, equipment_df, issues_df, current_date, days_by='priority',
+                   duration_divisor=100, min_duration=None):
+    """Turn scored equipment (see utils.fleet_scoring) into schedule rows with vectorized rules.
+
+    Maintained equipment is joined to its aggregated issues (priority 4 when
+    it has none) and gets:
+    - maintenance_type: PM03 for priority 1 or hydraulic issues, PM02 for
+      priority 2 or mechanical/electrical issues, PM01 otherwise
+    - suggested_date: 1 day out for critical work, 2-3 days for high, 1-2
+      weeks for medium and 2-4 weeks for low, shortened by confidence.
+      days_by='priority' picks the band from the priority alone;
+      days_by='maintenance_type' gives PM03 and PM02 the critical and high bands.
+    - estimated_duration: estimated cost / duration_divisor hours, at least
+      min_duration when given
+
+    Equipment ids come from equipment_df's equipment_id column, or its index
+    when the column is absent.
+    """
+    maintained = scored[scored['action'] == 1]
+    equipment = equipment_df.loc[maintained.index]
+    if 'equipment_id' in equipment.columns:
+        equipment_ids = equipment['equipment_id'].values
+    else:
+        equipment_ids = maintained.index.values
+
+    issues = summarize_issues(issues_df).reindex(equipment_ids)
+    priority = issues['priority'].fillna(4).values.astype(int)
+    hydraulic = issues['hydraulic'].fillna(False).values.astype(bool)
+    mech_elec = issues['mech_elec'].fillna(False).values.astype(bool)
+
+    maintenance_type = np.select(
+        [hydraulic | (priority == 1), mech_elec | (priority == 2)], ['PM03', 'PM02'], 'PM01'
+    )
+
+    confidence = maintained['confidence'].values.astype(np.float64)
+    high = np.clip(np.trunc(5 * (1 - confidence)), 2, 3)
+    medium = np.clip(np.trunc(14 * (1 - confidence)), 7, 14)
+    low = np.clip(np.trunc(30 * (1 - confidence)), 14, 30)
+    if days_by == 'maintenance_type':
+        urgent, soon = maintenance_type == 'PM03', maintenance_type == 'PM02'
+    else:
+        urgent, soon = priority == 1, priority == 2
+    days = np.select([urgent, soon, priority == 3], [1, high, medium], low).astype(int)
+
+    estimated_duration = maintained['estimated_cost'].values.astype(np.float64) / duration_divisor
+    if min_duration is not None:
+        estimated_duration = np.fmax(min_duration, estimated_duration)
+
+    return pd.DataFrame({
+        'equipment_id': equipment_ids,
+        'equipment_type': equipment['equipment_type'].values,
+        'functional_location': equipment['functional_location'].values,
+        'manufacturer': equipment['manufacturer'].values,
+        'suggested_date': (pd.Timestamp(current_date) + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d'),
+        'maintenance_type': maintenance_type,
+        'priority': pd.Series(priority).map(PRIORITY_NAMES).fillna('Low').values,
+        'confidence': confidence,
+        'breakdown_risk': maintained['breakdown_risk'].values.astype(np.float64),
+        'estimated_duration': estimated_duration,
+    }, columns=SCHEDULE_COLUMNS)
@@ -0,0 +1,130 @@
+import numpy as np
+import json
+import os
+import tempfile
+import warnings
+
+import torch
+import torch.nn as nn
+
+from models.dqn_agent import DQNetwork
+from models.fleet_features import FleetFeatures
+from models.maintenance_env import STATE_FEATURES
+
+
+def default_shared_dir():
+    """Prefer tmpfs so shared arrays never touch the disk"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'maintenance-scheduler')
+
+
+def publish_arrays(arrays, directory):
+    """Write named numpy arrays as .npy files that can be memory-mapped"""
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npy.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+        os.replace(tmp_path, os.path.join(directory, f'{name}.npy'))
+
+
+def attach_arrays(directory, names):
+    """Memory-map previously published arrays read-only"""
+    return {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in names}
+
+
+class SharedFleet:
+    """Policy weights and fleet feature arrays backed by memory-mapped files.
+
+    The gunicorn master publishes everything once (see gunicorn.conf.py) and
+    every worker maps the same files read-only, so the pages are shared
+    between processes instead of being copied into each worker.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, features, policy_net, manifest):
+        self.directory = directory
+        self.features = features
+        self.policy_net = policy_net
+        self.manifest = manifest
+
+    @classmethod
+    def publish(cls, directory, equipment_df, history_df, model_path, sources=()):
+        """Precompute fleet features, export policy weights and write a manifest.
+
+        sources lists the files the frames were read from; their modification
+        times are recorded so stale shared state can be detected.
+        """
+        features = FleetFeatures.from_frames(equipment_df, history_df)
+        arrays = dict(features.arrays)
+
+        for name in ('labels', 'keys'):
+            values = np.asarray(getattr(features, name))
+            arrays[name] = values if values.dtype.kind in 'iu' else values.astype(str)
+
+        policy_names = []
+        if os.path.exists(model_path) and model_path.endswith('.pth'):
+            checkpoint = torch.load(model_path, map_location='cpu')
+            for name, tensor in checkpoint['policy_net_state_dict'].items():
+                arrays[f'policy.{name}'] = tensor.numpy()
+                policy_names.append(name)
+
+        publish_arrays(arrays, directory)
+
+        manifest = {
+            'arrays': FleetFeatures.EQUIPMENT_ARRAYS + FleetFeatures.FLEET_ARRAYS,
+            'policy': policy_names,
+            'model_path': model_path,
+            'sources': {path: os.path.getmtime(path) for path in list(sources) + [model_path] if os.path.exists(path)},
+            'equipment': len(features)
+        }
+        with open(os.path.join(directory, cls.MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+        return cls.attach(directory)
+
+    @classmethod
+    def attach(cls, directory):
+        """Map published arrays and build a read-only policy network on top of them"""
+        with open(os.path.join(directory, cls.MANIFEST)) as f:
+            manifest = json.load(f)
+
+        arrays = attach_arrays(directory, manifest['arrays'])
+        labels = np.load(os.path.join(directory, 'labels.npy'), mmap_mode='r')
+        keys = np.load(os.path.join(directory, 'keys.npy'), mmap_mode='r')
+        features = FleetFeatures(labels, arrays, keys)
+
+        policy_net = None
+        if manifest['policy']:
+            policy_net = DQNetwork(len(STATE_FEATURES), 2)
+            weights = attach_arrays(directory, [f'policy.{name}' for name in manifest['policy']])
+            with warnings.catch_warnings():
+                # The mapped arrays are read-only; the network is only used for inference
+                warnings.simplefilter('ignore', UserWarning)
+                for name in manifest['policy']:
+                    module_name, param_name = name.rsplit('.', 1)
+                    tensor = torch.from_numpy(weights[f'policy.{name}'])
+                    setattr(getattr(policy_net, module_name), param_name,
+                            nn.Parameter(tensor, requires_grad=False))
+            policy_net.eval()
+
+        return cls(directory, features, policy_net, manifest)
+
+    def is_current(self, equipment_df):
+        """Whether the published state was built from this equipment frame and unchanged sources"""
+        if len(equipment_df) != len(self.features):
+            return False
+        for path, mtime in self.manifest['sources'].items():
+            if not os.path.exists(path) or os.path.getmtime(path) != mtime:
+                return False
+        return np.array_equal(np.asarray(equipment_df.index).astype(str),
+                              np.asarray(self.features.labels).astype(str))
+
+    def predict_maintenance(self, states):
+        """Same contract as MaintenanceAgent.predict_maintenance"""
+        with torch.no_grad():
+            q_values = self.policy_net(torch.FloatTensor(states))
+            actions = q_values.argmax(dim=1)
+            maintenance_probs = torch.softmax(q_values, dim=1)
+            return actions.numpy(), maintenance_probs.numpy()
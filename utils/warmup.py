@@ -0,0 +1,79 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Runs named startup steps in a background thread and tracks progress.
+
+    Threads do not survive a fork, so start() is per process: calling it
+    again in a forked gunicorn worker starts a fresh warmup there, while
+    repeated calls in the same process are no-ops.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps  # list of (name, callable)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.step_status = {name: {'status': 'pending', 'seconds': None} for name, _ in self.steps}
+
+    def start(self):
+        """Start warming up in the background, once per process"""
+        if self._pid == os.getpid():
+            return False
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._reset()
+            self.started_at = time.time()
+            threading.Thread(target=self._run, name='warmup', daemon=True).start()
+        return True
+
+    def _run(self):
+        for name, step in self.steps:
+            self.step_status[name]['status'] = 'running'
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.step_status[name].update(status='failed', seconds=time.perf_counter() - start)
+                self.error = f"{name}: {str(e)}"
+                logger.exception(f"Warmup step '{name}' failed")
+                return
+            self.step_status[name].update(status='done', seconds=time.perf_counter() - start)
+            logger.info(f"Warmup step '{name}' done in {self.step_status[name]['seconds']:.2f}s")
+        self.finished_at = time.time()
+
+    @property
+    def ready(self):
+        return self.finished_at is not None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def report(self):
+        """Progress summary for the readiness endpoint"""
+        done = sum(1 for status in self.step_status.values() if status['status'] == 'done')
+        if self.started_at is None:
+            elapsed = None
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            'ready': self.ready,
+            'progress': f"{done}/{len(self.steps)}",
+            'steps': {name: dict(status) for name, status in self.step_status.items()},
+            'elapsed_seconds': elapsed,
+            'error': self.error,
+            'pid': os.getpid()
+        }
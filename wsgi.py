@@ -1,5 +1,8 @@
 import os
-from server import app as application
+from server import app as application, warmup
+
+# Warm up the model and data caches in the background
+warmup.start()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))